@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic data generator for scale testing the Atal Idea Generator API.
+
+Produces seeded, reproducible datasets of components, project templates,
+saved ideas, user preferences and user stats, and bulk-loads them into
+MongoDB with batched inserts (or writes JSON Lines files when --output-dir
+is given). The same seed and sizes always produce the same documents.
+
+Examples:
+    python generate_fixtures.py --scale medium --drop
+    python generate_fixtures.py --scale large --seed 7 --compact
+    python generate_fixtures.py --users 50000 --ideas-per-user 40 --output-dir fixtures/
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List
+
+# Fixture sizes: components, templates, users, mean saved ideas per user
+SCALES = {
+    "small": {"components": 200, "templates": 100, "users": 100, "ideas_per_user": 10},
+    "medium": {"components": 1000, "templates": 2000, "users": 10000, "ideas_per_user": 15},
+    "large": {"components": 5000, "templates": 20000, "users": 100000, "ideas_per_user": 20},
+    "xlarge": {"components": 10000, "templates": 50000, "users": 500000, "ideas_per_user": 20},
+}
+
+BASE_DATE = datetime(2025, 1, 1)
+
+# (category, weight, base part names)
+COMPONENT_CATEGORIES = [
+    ("Sensors", 40, ["Soil Moisture Sensor", "PM2.5 Sensor", "CO2 Sensor", "DHT22 Temperature Sensor",
+                     "Heart Rate Sensor", "Ultrasonic Sensor", "PIR Motion Sensor", "Gas Sensor", "Accelerometer",
+                     "Light Sensor", "Rain Sensor", "Flame Sensor"]),
+    ("Actuators", 15, ["Servo Motor", "Water Pump", "Relay Module", "Stepper Motor", "DC Motor", "Solenoid Valve", "Buzzer"]),
+    ("Microcontrollers", 10, ["Arduino Uno", "Arduino Nano", "ESP32", "ESP8266", "STM32 Blue Pill"]),
+    ("Displays", 10, ["OLED Display", "LCD Display", "7-Segment Display", "LED Matrix", "TFT Display"]),
+    ("Communication", 10, ["Bluetooth Module", "GSM Module", "LoRa Module", "RFID Reader", "GPS Module"]),
+    ("Power", 10, ["Solar Panel", "Li-ion Battery", "Buck Converter", "Power Bank Module"]),
+    ("Single Board Computers", 5, ["Raspberry Pi 4", "Raspberry Pi Zero", "Jetson Nano"]),
+]
+
+COMPONENT_VARIANTS = ["", "Mini", "Pro", "V2", "Waterproof", "High Precision", "Industrial", "Low Power"]
+
+# (tag, weight): a few themes dominate, as in real classroom submissions
+TAGS = [
+    ("IoT", 30), ("Environment", 20), ("Agriculture", 15), ("Healthcare", 12), ("Automation", 12),
+    ("AI", 10), ("Robotics", 8), ("Smart City", 8), ("Transportation", 6), ("Education", 6),
+    ("Energy", 5), ("Wearables", 4), ("Safety", 4), ("Water", 3), ("Accessibility", 2),
+]
+
+DIFFICULTIES = [("Beginner", 45), ("Intermediate", 35), ("Advanced", 20)]
+AVAILABILITY = [("Available", 70), ("Partially Available", 20), ("Not Available", 10)]
+DURATIONS = ["1-2 hours", "Half day", "1 week", "2-4 weeks"]
+TEAM_SIZES = ["Individual", "Pair", "Small team", "Large team"]
+
+SUBJECTS = ["plant", "classroom", "water tank", "street light", "bicycle", "beehive", "greenhouse", "bus stop",
+            "kitchen", "library", "hospital ward", "pond", "school gate", "farm", "parking lot", "elderly home"]
+ACTIONS = ["monitor", "automate", "protect", "optimise", "track", "alert on", "clean", "illuminate"]
+PROBLEMS = ["wastes energy", "needs constant manual checks", "is unsafe at night", "loses water",
+            "is hard to monitor remotely", "responds too slowly to emergencies", "produces avoidable waste"]
+FEATURES = ["SMS notifications", "Solar panel integration", "Mobile app dashboard", "Machine learning predictions",
+            "Voice control", "Historical data logging", "Cloud sync", "Self-calibration", "Low power sleep mode",
+            "Multi-language display", "Emergency alerts", "Offline mode"]
+SCALE_OPTIONS = ["Multiple site monitoring", "IoT connectivity", "Weather API integration", "City-wide deployment",
+                 "Government database integration", "Community data sharing", "Industrial-scale version",
+                 "School-wide rollout"]
+NOTES = ["Try this for the science fair", "Ask lab incharge for sensors", "Good for a team of three",
+         "Need to check pump voltage", "Combine with last year's project", "Prototype first on breadboard"]
+
+
+def weighted_choice(rng: random.Random, options):
+    return rng.choices([value for value, _ in options], weights=[weight for _, weight in options])[0]
+
+
+def zipf_cum_weights(count: int, exponent: float = 1.1) -> List[float]:
+    """Cumulative popularity weights where item i has weight 1 / (i + 1)^exponent"""
+    return list(itertools.accumulate(1 / math.pow(rank + 1, exponent) for rank in range(count)))
+
+
+def seeded_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def seeded_date(rng: random.Random, max_days: int = 365) -> datetime:
+    return BASE_DATE + timedelta(seconds=rng.randrange(max_days * 86400))
+
+
+def generate_components(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    """Components spread over categories by weight, with unique names"""
+    components = []
+    seen = set()
+    categories = [(entry, entry[1]) for entry in COMPONENT_CATEGORIES]
+    while len(components) < count:
+        category, _, names = weighted_choice(rng, categories)
+        name = " ".join(filter(None, [rng.choice(COMPONENT_VARIANTS), rng.choice(names)]))
+        if name in seen:
+            name = f"{name} #{len(components)}"
+        seen.add(name)
+        low = int(rng.lognormvariate(5.5, 0.9))
+        components.append({
+            "id": seeded_uuid(rng),
+            "name": name,
+            "category": category,
+            "description": f"{name} for {rng.choice(SUBJECTS)} projects",
+            "price_range": f"₹{low}-{int(low * rng.uniform(1.2, 2.0))}",
+            "availability": weighted_choice(rng, AVAILABILITY),
+            "image_url": None,
+            "specifications": {"voltage": rng.choice(["3.3V", "5V", "12V"]), "weight_g": rng.randint(2, 400)},
+            "created_at": seeded_date(rng),
+        })
+    return components
+
+
+def generate_templates(rng: random.Random, count: int, components: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Project templates whose components follow a Zipf popularity curve"""
+    names = [component["name"] for component in components]
+    popularity = zipf_cum_weights(len(names))
+    templates = []
+    for position in range(count):
+        required = set()
+        target = rng.randint(3, 7)
+        while len(required) < min(target, len(names)):
+            required.add(rng.choices(names, cum_weights=popularity)[0])
+        tags = []
+        tag_count = rng.randint(2, 4)
+        while len(tags) < tag_count:
+            tag = weighted_choice(rng, TAGS)
+            if tag not in tags:
+                tags.append(tag)
+        subject, action = rng.choice(SUBJECTS), rng.choice(ACTIONS)
+        title = f"Smart {subject.title()} {rng.choice(['Monitor', 'Controller', 'Assistant', 'System', 'Guard'])} {position}"
+        templates.append({
+            "id": f"gen-{position}",
+            "title": title,
+            "description": f"A {tags[0].lower()} project that uses {', '.join(sorted(required)[:3])} to {action} a {subject}.",
+            "problem_statement": f"A typical {subject} {rng.choice(PROBLEMS)}, and affordable tools to fix it are rarely available to students.",
+            "working_principle": f"Sensors read the state of the {subject} and a microcontroller decides when to {action} it, "
+                                 f"reporting readings on a display and raising alerts when thresholds are crossed.",
+            "difficulty": weighted_choice(rng, DIFFICULTIES),
+            "estimated_cost": f"₹{int(rng.lognormvariate(7.0, 0.6)):,}",
+            "required_components": sorted(required),
+            "innovation_elements": rng.sample(FEATURES, 3),
+            "scalability_options": rng.sample(SCALE_OPTIONS, 3),
+            "tags": tags,
+            "theme": tags[0],
+        })
+    return templates
+
+
+def generate_user_documents(rng: random.Random, user_count: int, templates: List[Dict[str, Any]],
+                            ideas_per_user: float, compact: bool):
+    """Yield (collection, document) pairs for each user's preferences, ideas and stats"""
+    popularity = zipf_cum_weights(len(templates))
+    for position in range(user_count):
+        user_id = f"user-{position:08d}"
+        created = seeded_date(rng)
+        yield "user_preferences", {
+            "id": seeded_uuid(rng),
+            "user_id": user_id,
+            "selected_themes": rng.sample([tag for tag, _ in TAGS], rng.randint(1, 4)),
+            "skill_level": weighted_choice(rng, DIFFICULTIES),
+            "preferred_duration": rng.choice(DURATIONS),
+            "team_size": rng.choice(TEAM_SIZES),
+            "interests": rng.sample([tag for tag, _ in TAGS], rng.randint(0, 3)),
+            "notifications_enabled": rng.random() < 0.8,
+            "dark_mode_enabled": rng.random() < 0.35,
+            "last_updated": created,
+        }
+        # Heavy-tailed: most users save a few ideas, some save many
+        idea_count = min(int(rng.expovariate(1 / ideas_per_user)), int(ideas_per_user * 20))
+        for _ in range(idea_count):
+            template = rng.choices(templates, cum_weights=popularity)[0]
+            yield "saved_ideas", saved_idea_document(rng, user_id, template, compact)
+        yield "user_stats", {
+            "id": seeded_uuid(rng),
+            "user_id": user_id,
+            "ideas_generated": idea_count + rng.randint(0, idea_count * 3 + 5),
+            "projects_completed": rng.randint(0, max(idea_count // 4, 0)),
+            "components_scanned": rng.randint(0, 50),
+            "days_active": rng.randint(1, 120),
+            "last_active_date": seeded_date(rng),
+        }
+
+
+def saved_idea_document(rng: random.Random, user_id: str, template: Dict[str, Any], compact: bool) -> Dict[str, Any]:
+    created = seeded_date(rng)
+    idea = {
+        "id": seeded_uuid(rng),
+        "user_id": user_id,
+        "template_id": template["id"],
+        "availability": weighted_choice(rng, AVAILABILITY[:2]),
+        "created_at": created,
+        "updated_at": created + timedelta(minutes=rng.randrange(0, 60 * 24 * 30)),
+        "is_favorite": rng.random() < 0.2,
+        "tags": list(template["tags"]),
+        "notes": rng.choice(NOTES) if rng.random() < 0.3 else "",
+    }
+    # A minority of users edit the title
+    if rng.random() < 0.1:
+        idea["title"] = f"My {template['title']}"
+    if not compact:
+        idea.setdefault("title", template["title"])
+        idea.update({
+            "description": template["description"],
+            "problem_statement": template["problem_statement"],
+            "working_principle": template["working_principle"],
+            "difficulty": template["difficulty"],
+            "estimated_cost": template["estimated_cost"],
+            "components": template["required_components"],
+            "innovation_elements": template["innovation_elements"],
+            "scalability_options": template["scalability_options"],
+        })
+    return idea
+
+
+class MongoSink:
+    """Buffer documents per collection and write them with unordered insert_many batches"""
+
+    def __init__(self, mongo_url: str, database: str, batch_size: int, drop: bool):
+        from pymongo import MongoClient
+        self.db = MongoClient(mongo_url)[database]
+        self.batch_size = batch_size
+        self.buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self.counts: Dict[str, int] = {}
+        self.drop = drop
+
+    def prepare(self, collections: Iterable[str]):
+        if self.drop:
+            for name in collections:
+                self.db[name].drop()
+            self.db["idea_aggregates"].drop()
+
+    def add(self, collection: str, document: Dict[str, Any]):
+        buffer = self.buffers.setdefault(collection, [])
+        buffer.append(document)
+        if len(buffer) >= self.batch_size:
+            self.flush(collection)
+
+    def flush(self, collection: str):
+        buffer = self.buffers.get(collection)
+        if buffer:
+            self.db[collection].insert_many(buffer, ordered=False)
+            self.counts[collection] = self.counts.get(collection, 0) + len(buffer)
+            buffer.clear()
+
+    def close(self):
+        for collection in list(self.buffers):
+            self.flush(collection)
+
+
+class JsonLinesSink:
+    """Local stand-in for MongoDB: one <collection>.jsonl file per collection"""
+
+    def __init__(self, output_dir: str):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.files = {}
+        self.counts: Dict[str, int] = {}
+
+    def prepare(self, collections: Iterable[str]):
+        for name in collections:
+            self.files[name] = open(os.path.join(self.output_dir, f"{name}.jsonl"), "w", encoding="utf-8")
+
+    def add(self, collection: str, document: Dict[str, Any]):
+        self.files[collection].write(json.dumps(document, default=str, ensure_ascii=False) + "\n")
+        self.counts[collection] = self.counts.get(collection, 0) + 1
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic fixtures for scale testing")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="preset fixture sizes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--components", type=int, help="override the preset component count")
+    parser.add_argument("--templates", type=int, help="override the preset project template count")
+    parser.add_argument("--users", type=int, help="override the preset user count")
+    parser.add_argument("--ideas-per-user", type=float, help="override the preset mean saved ideas per user")
+    parser.add_argument("--compact", action="store_true",
+                        help="store saved ideas as template references (see COMPACT_IDEA_STORAGE)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="atal_idea_generator")
+    parser.add_argument("--drop", action="store_true", help="drop the target collections before loading")
+    parser.add_argument("--output-dir", help="write JSON Lines files here instead of loading into MongoDB")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        override = getattr(args, key)
+        if override is not None:
+            sizes[key] = override
+
+    rng = random.Random(args.seed)
+    collections = ["components", "project_templates", "user_preferences", "saved_ideas", "user_stats"]
+    sink = JsonLinesSink(args.output_dir) if args.output_dir else MongoSink(
+        args.mongo_url, args.database, args.batch_size, args.drop
+    )
+    sink.prepare(collections)
+
+    started = time.perf_counter()
+    components = generate_components(rng, sizes["components"])
+    for component in components:
+        sink.add("components", component)
+    templates = generate_templates(rng, sizes["templates"], components)
+    for template in templates:
+        sink.add("project_templates", dict(template))
+
+    for collection, document in generate_user_documents(rng, sizes["users"], templates, sizes["ideas_per_user"], args.compact):
+        sink.add(collection, document)
+    sink.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(sink.counts.values())
+    print(f"Generated {total:,} documents in {elapsed:.1f}s (seed={args.seed}, scale={args.scale})")
+    for collection in collections:
+        print(f"  {collection}: {sink.counts.get(collection, 0):,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
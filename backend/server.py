@@ -1,13 +1,47 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta
 import os
 import uuid
 from enum import Enum
+import heapq
+import asyncio
+import math
+import time
+import gzip
+import hashlib
+import hmac
+import json
+import re
+import sys
+import threading
+import cProfile
+import logging
+import tracemalloc
+from collections import Counter, OrderedDict
+from urllib.parse import quote, unquote
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: catalog rebuilds are not serialised across workers
+    fcntl = None
+
+from template_catalog import TemplateCatalog, read_catalog_version, search_pattern, write_catalog_file
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(title="Atal Idea Generator API", version="1.0.0")
@@ -21,11 +55,247 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q=0"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+class CompressionMiddleware:
+    """Compress complete JSON responses of at least `minimum_size` bytes.
+
+    Streamed responses (more than one body message, e.g. Server-Sent Events)
+    are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+            if message.get("more_body", False):
+                # Stream as-is from the first chunk onwards
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+            await send_compressed(start_message, message["body"])
+
+        async def send_compressed(start, body):
+            response_headers = [(k, v) for k, v in start["headers"]]
+            names = {k.lower() for k, _ in response_headers}
+            content_type = dict((k.lower(), v) for k, v in response_headers).get(b"content-type", b"")
+            if (
+                len(body) < self.minimum_size
+                or b"content-encoding" in names
+                or not content_type.startswith(b"application/json")
+            ):
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+            if encoding == "br":
+                body = brotli.compress(body, quality=4)
+            else:
+                body = gzip.compress(body, compresslevel=6)
+            response_headers = [(k, v) for k, v in response_headers if k.lower() != b"content-length"]
+            response_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await send({**start, "headers": response_headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+app.add_middleware(CompressionMiddleware)
+
+# Opt-in request profiling: "off" (default, middleware not installed),
+# "header" (requests sending X-Profile: <PROFILE_TOKEN>) or "always"
+PROFILING_MODE = os.environ.get("PROFILING_MODE", "off").lower()
+PROFILE_ROUTES = [
+    route.strip() for route in
+    os.environ.get("PROFILE_ROUTES", "/api/generate-ideas,/api/ideas,/api/components").split(",")
+    if route.strip()
+]
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", "0.005"))
+# Secret a client must send in X-Profile; header mode profiles nothing without it
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+# Only the newest PROFILE_KEEP captures are kept, taken at most once per PROFILE_MIN_INTERVAL_SECONDS
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
+PROFILE_MIN_INTERVAL_SECONDS = float(os.environ.get("PROFILE_MIN_INTERVAL_SECONDS", "1"))
+PROFILE_SUFFIXES = (".prof", ".collapsed", ".alloc.txt")
+
+class StackSampler(threading.Thread):
+    """Sample one thread's Python stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+def write_profile(base_path: str, profiler: cProfile.Profile, sampler: StackSampler, snapshot):
+    os.makedirs(os.path.dirname(base_path), exist_ok=True)
+    profiler.dump_stats(f"{base_path}.prof")
+    with open(f"{base_path}.collapsed", "w") as f:
+        f.write(sampler.collapsed())
+    with open(f"{base_path}.alloc.txt", "w") as f:
+        for stat in snapshot.statistics("lineno")[:50]:
+            f.write(f"{stat}\n")
+
+def prune_profiles(directory: str, keep: int):
+    """Delete all but the newest `keep` captures (ids start with their timestamp)"""
+    profile_ids = sorted({
+        name[:-len(suffix)] for name in os.listdir(directory)
+        for suffix in PROFILE_SUFFIXES if name.endswith(suffix)
+    })
+    for profile_id in profile_ids[:max(len(profile_ids) - keep, 0)]:
+        for suffix in PROFILE_SUFFIXES:
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+class ProfilingMiddleware:
+    """Capture cProfile, sampled wall-clock stacks and tracemalloc allocations per request.
+
+    Writes <id>.prof, <id>.collapsed (flamegraph.pl / speedscope input) and
+    <id>.alloc.txt to `directory` and returns the id in X-Profile-Id. Only
+    one request is profiled at a time and at most once per `min_interval`
+    seconds; other requests run unprofiled, though their work on the event
+    loop can still show up in the capture. Only the newest `keep` captures
+    are kept.
+    """
+
+    def __init__(self, app, mode: str = PROFILING_MODE, routes: List[str] = PROFILE_ROUTES,
+                 token: str = PROFILE_TOKEN, directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP,
+                 min_interval: float = PROFILE_MIN_INTERVAL_SECONDS):
+        self.app = app
+        self.mode = mode
+        self.routes = tuple(routes)
+        self.token = token.encode()
+        self.directory = directory
+        self.keep = keep
+        self.min_interval = min_interval
+        self.last_capture = float("-inf")
+        self.lock = asyncio.Lock()
+
+    def wants_profile(self, scope) -> bool:
+        if not scope["path"].startswith(self.routes):
+            return False
+        if time.monotonic() - self.last_capture < self.min_interval:
+            return False
+        if self.mode == "always":
+            return True
+        sent = dict(scope["headers"]).get(b"x-profile", b"")
+        return bool(self.token) and hmac.compare_digest(sent, self.token)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.lock.locked() or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        async with self.lock:
+            self.last_capture = time.monotonic()
+            profile_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message["headers"], (b"x-profile-id", profile_id.encode())]}
+                await send(message)
+
+            sampler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+            profiler = cProfile.Profile()
+            tracemalloc.start()
+            sampler.start()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+                sampler.stopped.set()
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                sampler.join()
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(
+                    None, write_profile, os.path.join(self.directory, profile_id), profiler, sampler, snapshot
+                )
+                await loop.run_in_executor(None, prune_profiles, self.directory, self.keep)
+
+def install_profiling(app, mode: str) -> bool:
+    """Add ProfilingMiddleware unless profiling is off"""
+    if mode == "off":
+        return False
+    if mode == "header" and not PROFILE_TOKEN:
+        logger.warning("PROFILING_MODE=header without PROFILE_TOKEN: no requests will be profiled")
+    app.add_middleware(ProfilingMiddleware, mode=mode)
+    return True
+
+install_profiling(app, PROFILING_MODE)
+
 # MongoDB connection
 MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
 client = AsyncIOMotorClient(MONGO_URL)
 db = client.atal_idea_generator
 
+# Requests without an X-User-Id header (and documents written before user
+# scoping existed) belong to this user
+DEFAULT_USER_ID = "default"
+
 # Pydantic Models
 class DifficultyLevel(str, Enum):
     BEGINNER = "Beginner"
@@ -50,6 +320,7 @@ class Component(BaseModel):
 
 class UserPreferences(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str = DEFAULT_USER_ID
     selected_themes: List[str] = Field(default_factory=list)
     skill_level: DifficultyLevel = DifficultyLevel.BEGINNER
     preferred_duration: str = "1-2 hours"
@@ -61,6 +332,8 @@ class UserPreferences(BaseModel):
 
 class SavedIdea(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str = DEFAULT_USER_ID
+    template_id: Optional[str] = None
     title: str
     description: str
     problem_statement: str
@@ -79,6 +352,7 @@ class SavedIdea(BaseModel):
 
 class UserStats(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str = DEFAULT_USER_ID
     ideas_generated: int = 0
     projects_completed: int = 0
     components_scanned: int = 0
@@ -89,131 +363,629 @@ class IdeaGenerationRequest(BaseModel):
     selected_components: List[str]
     user_preferences: Optional[UserPreferences] = None
     theme: Optional[str] = None
-    count: int = 5
+    count: int = Field(default=5, ge=1)
+    diversify: bool = False
+    diversity_lambda: float = Field(default=0.7, ge=0.0, le=1.0)
 
 # Database helper functions
 async def get_collection(collection_name: str):
     return db[collection_name]
 
+async def collection_etag(collection, query: Dict[str, Any], version_field: str) -> str:
+    """Weak ETag derived from the document count and the newest `version_field`"""
+    count = await collection.count_documents(query)
+    latest = await collection.find_one(
+        query, projection={version_field: 1, "_id": 0}, sort=[(version_field, -1)]
+    )
+    version = latest.get(version_field) if latest else None
+    digest = hashlib.sha1(f"{count}:{version}".encode()).hexdigest()[:16]
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of an ETag against the request's If-None-Match header"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+async def get_user_id(x_user_id: str = Header(DEFAULT_USER_ID)) -> str:
+    """Resolve the user every preferences, ideas and stats query is scoped to"""
+    if not x_user_id.strip():
+        raise HTTPException(status_code=400, detail="X-User-Id header must not be empty")
+    return x_user_id.strip()
+
+# Incrementally maintained idea aggregates (one document per user)
+AGGREGATE_RECONCILE_INTERVAL_SECONDS = int(os.environ.get("AGGREGATE_RECONCILE_INTERVAL_SECONDS", "3600"))
+
+def aggregate_key(value: Any) -> str:
+    """Encode a tag or difficulty so it is safe to use as a field name"""
+    return quote(str(getattr(value, "value", value)), safe=" ").replace(".", "%2E")
+
+def idea_contribution(idea: Dict[str, Any]) -> Counter:
+    """Counters a single saved idea contributes to its owner's aggregates"""
+    difficulty = idea.get("difficulty")
+    if difficulty is None:
+        # Compact ideas keep their difficulty on the template
+        template = TEMPLATE_INDEX.get(idea.get("template_id"))
+        difficulty = template["difficulty"] if template else "Unknown"
+    contribution = Counter({"total": 1, f"by_difficulty.{aggregate_key(difficulty)}": 1})
+    if idea.get("is_favorite"):
+        contribution["favorites"] += 1
+    for tag in set(idea.get("tags", [])):
+        contribution[f"by_tag.{aggregate_key(tag)}"] += 1
+    return contribution
+
+async def open_aggregates(collection, user_id: str):
+    """Mark a change as pending, creating the aggregates document if needed"""
+    update = {
+        "$inc": {"pending": 1, "version": 1},
+        "$set": {"updated_at": datetime.now()},
+        # Users whose ideas predate the aggregates get them backfilled by reconciliation
+        "$setOnInsert": {"needs_backfill": True}
+    }
+    try:
+        await collection.update_one({"user_id": user_id}, update, upsert=True)
+    except DuplicateKeyError:
+        # Lost a concurrent upsert; the document exists now
+        await collection.update_one({"user_id": user_id}, update, upsert=True)
+
+@asynccontextmanager
+async def aggregate_change(user_id: str):
+    """Bracket a saved-idea write; yields a Counter to fill with the write's delta.
+
+    While a change is open the aggregates document has a non-zero `pending`
+    count and reconciliation waits for it, so a scan never counts an idea
+    whose delta is applied afterwards (or the reverse).
+    """
+    collection = await get_collection("idea_aggregates")
+    await open_aggregates(collection, user_id)
+    delta = Counter()
+    try:
+        yield delta
+    finally:
+        increments = {field: count for field, count in delta.items() if count}
+        await collection.update_one(
+            {"user_id": user_id},
+            {"$inc": {**increments, "pending": -1, "version": 1}, "$set": {"updated_at": datetime.now()}}
+        )
+
+def format_breakdown(aggregates: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "total": aggregates.get("total", 0),
+        "favorites": aggregates.get("favorites", 0),
+        "by_tag": {unquote(k): v for k, v in aggregates.get("by_tag", {}).items() if v},
+        "by_difficulty": {unquote(k): v for k, v in aggregates.get("by_difficulty", {}).items() if v},
+    }
+
+# Attempts to apply a repair before giving up until the next reconciliation
+AGGREGATE_RECONCILE_ATTEMPTS = 5
+AGGREGATE_PENDING_RETRY_SECONDS = 0.05
+# Pending changes older than this are assumed lost (e.g. a crashed worker)
+AGGREGATE_PENDING_TIMEOUT_SECONDS = 60
+
+async def reconcile_aggregates(user_id: str) -> Dict[str, Any]:
+    """Recompute a user's aggregates from saved_ideas, report drift and repair it.
+
+    The repair is applied as an $inc of the drift, guarded on the stored
+    `version` so a change landing during the scan makes us rescan instead of
+    overwriting it. Reconciliation waits while changes are pending.
+    """
+    ideas_collection = await get_collection("saved_ideas")
+    aggregates_collection = await get_collection("idea_aggregates")
+    drift = {}
+    for attempt in range(AGGREGATE_RECONCILE_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(AGGREGATE_PENDING_RETRY_SECONDS)
+        stored = await aggregates_collection.find_one({"user_id": user_id})
+        if (
+            stored and stored.get("pending", 0) > 0
+            and stored["updated_at"] > datetime.now() - timedelta(seconds=AGGREGATE_PENDING_TIMEOUT_SECONDS)
+        ):
+            continue
+        expected = Counter()
+        async for idea in ideas_collection.find(
+            {"user_id": user_id}, projection={"difficulty": 1, "tags": 1, "is_favorite": 1, "template_id": 1, "_id": 0}
+        ):
+            expected.update(idea_contribution(idea))
+        
+        actual = Counter()
+        if stored:
+            actual.update({"total": stored.get("total", 0), "favorites": stored.get("favorites", 0)})
+            for group in ("by_tag", "by_difficulty"):
+                for key, count in stored.get(group, {}).items():
+                    actual[f"{group}.{key}"] = count
+        
+        drift = {}
+        for field in set(expected) | set(actual):
+            if expected[field] != actual[field]:
+                drift[field] = {"expected": expected[field], "actual": actual[field]}
+        
+        if not stored:
+            document = {"user_id": user_id, "total": expected["total"], "favorites": expected["favorites"],
+                        "by_tag": {}, "by_difficulty": {}, "version": 0, "updated_at": datetime.now()}
+            for field, count in expected.items():
+                group, _, key = field.partition(".")
+                if key and count:
+                    document[group][key] = count
+            try:
+                await aggregates_collection.insert_one(document)
+            except DuplicateKeyError:
+                # Built concurrently; check that document instead
+                continue
+            return {"user_id": user_id, "drift": drift, "repaired": bool(drift)}
+        
+        if not drift and not stored.get("needs_backfill") and not stored.get("pending"):
+            return {"user_id": user_id, "drift": drift, "repaired": False}
+        
+        version = stored.get("version")
+        result = await aggregates_collection.update_one(
+            {"user_id": user_id, "version": version if version is not None else {"$exists": False}},
+            {
+                "$inc": {**{field: counts["expected"] - counts["actual"] for field, counts in drift.items()},
+                         "version": 1},
+                "$set": {"updated_at": datetime.now(), "needs_backfill": False, "pending": 0}
+            }
+        )
+        if result.modified_count:
+            return {"user_id": user_id, "drift": drift, "repaired": bool(drift)}
+    return {"user_id": user_id, "drift": drift, "repaired": False}
+
+async def reconcile_all_aggregates() -> List[Dict[str, Any]]:
+    ideas_collection = await get_collection("saved_ideas")
+    return [await reconcile_aggregates(user_id) for user_id in await ideas_collection.distinct("user_id")]
+
+async def run_aggregate_reconciliation():
+    """Periodically recompute every user's aggregates to catch drift"""
+    while True:
+        await asyncio.sleep(AGGREGATE_RECONCILE_INTERVAL_SECONDS)
+        try:
+            reports = await reconcile_all_aggregates()
+            drifted = [report["user_id"] for report in reports if report["drift"]]
+            if drifted:
+                logger.info("Repaired aggregate drift for %d users", len(drifted))
+        except Exception:
+            logger.exception("Aggregate reconciliation failed")
+
+# Rate limiting and admission control for the expensive routes
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+# Header holding the real client address when the proxy in front of the app
+# is not trusted by uvicorn (see --forwarded-allow-ips), e.g. "X-Real-IP"
+ADMISSION_ADDRESS_HEADER = os.environ.get("ADMISSION_ADDRESS_HEADER", "").lower()
+
+def client_address(request: Request) -> str:
+    """Address the per-address rate limit is keyed on"""
+    if ADMISSION_ADDRESS_HEADER:
+        forwarded = request.headers.get(ADMISSION_ADDRESS_HEADER, "").split(",")[0].strip()
+        if forwarded:
+            return forwarded
+    return request.client.host if request.client else "unknown"
+
+class AdmissionController:
+    """Per-client token buckets plus a bounded concurrency queue for one route.
+
+    Used as a FastAPI dependency: clients over their rate get 429, and
+    requests arriving while `queue_limit` others are already waiting for a
+    concurrency slot get 503, both with a Retry-After header.
+
+    Every request spends a token from its client address bucket and from the
+    narrower (address, X-User-Id) bucket, so rotating the header cannot buy a
+    fresh burst.
+    """
+
+    # Least recently used buckets are evicted beyond this many
+    MAX_TRACKED_CLIENTS = 10000
+
+    def __init__(self, route: str, rate_per_minute: int, burst: int, concurrency: int, queue_limit: int,
+                 address_rate_per_minute: int, address_burst: int):
+        self.route = route
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.address_rate = address_rate_per_minute / 60
+        self.address_burst = address_burst
+        self.concurrency = concurrency
+        self.queue_limit = queue_limit
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.buckets: "OrderedDict[Tuple[str, Optional[str]], TokenBucket]" = OrderedDict()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+    def _bucket(self, key: Tuple[str, Optional[str]], rate: float, capacity: int) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(rate, capacity)
+            while len(self.buckets) > self.MAX_TRACKED_CLIENTS:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        bucket.refill()
+        return bucket
+
+    def take(self, address: str, user_id: str) -> float:
+        """Spend a token from both buckets; return 0 on success or the seconds to wait"""
+        buckets = (
+            self._bucket((address, None), self.address_rate, self.address_burst),
+            self._bucket((address, user_id), self.rate, self.burst),
+        )
+        retry_after = max(bucket.wait_time() for bucket in buckets)
+        if not retry_after:
+            for bucket in buckets:
+                bucket.tokens -= 1
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "route": self.route,
+            "concurrency": self.concurrency,
+            "queue_limit": self.queue_limit,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+            "tracked_clients": len(self.buckets),
+        }
+
+    async def __call__(self, request: Request, x_user_id: str = Header(DEFAULT_USER_ID)):
+        address = client_address(request)
+        retry_after = self.take(address, x_user_id)
+        if retry_after:
+            self.rate_limited += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+        if self.semaphore.locked() and self.waiting >= self.queue_limit:
+            self.shed += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.semaphore.release()
+
+generate_admission = AdmissionController(
+    "generate-ideas",
+    rate_per_minute=int(os.environ.get("GENERATE_RATE_PER_MINUTE", "30")),
+    burst=int(os.environ.get("GENERATE_RATE_BURST", "10")),
+    concurrency=int(os.environ.get("GENERATE_CONCURRENCY", "4")),
+    queue_limit=int(os.environ.get("GENERATE_QUEUE_LIMIT", "32")),
+    address_rate_per_minute=int(os.environ.get("GENERATE_ADDRESS_RATE_PER_MINUTE", "120")),
+    address_burst=int(os.environ.get("GENERATE_ADDRESS_RATE_BURST", "40")),
+)
+search_admission = AdmissionController(
+    "ideas-search",
+    rate_per_minute=int(os.environ.get("SEARCH_RATE_PER_MINUTE", "60")),
+    burst=int(os.environ.get("SEARCH_RATE_BURST", "20")),
+    concurrency=int(os.environ.get("SEARCH_CONCURRENCY", "8")),
+    queue_limit=int(os.environ.get("SEARCH_QUEUE_LIMIT", "64")),
+    address_rate_per_minute=int(os.environ.get("SEARCH_ADDRESS_RATE_PER_MINUTE", "240")),
+    address_burst=int(os.environ.get("SEARCH_ADDRESS_RATE_BURST", "80")),
+)
+
+# Base project templates with component mappings
+PROJECT_TEMPLATES = [
+    {
+        "id": "smart-plant-watering",
+        "title": "Smart Plant Watering System",
+        "description": "An automated irrigation system that monitors soil moisture and waters plants when needed using Arduino and sensors.",
+        "problem_statement": "Many people struggle to maintain proper watering schedules for their plants, leading to over-watering or under-watering, which can harm plant health.",
+        "working_principle": "The system uses a soil moisture sensor to detect when the soil becomes dry. When moisture levels drop below a threshold, the Arduino triggers a water pump to irrigate the plant.",
+        "difficulty": "Beginner",
+        "estimated_cost": "₹850",
+        "required_components": ["Arduino Uno", "Soil Moisture Sensor", "Water Pump", "LCD Display", "Relay Module"],
+        "innovation_elements": ["Automatic threshold adjustment", "SMS notifications", "Solar panel integration"],
+        "scalability_options": ["Multiple plant monitoring", "IoT connectivity", "Weather API integration"],
+        "tags": ["Agriculture", "IoT", "Automation"],
+        "theme": "Agriculture"
+    },
+    {
+        "id": "air-quality-monitor",
+        "title": "Air Quality Monitor with Alert System",
+        "description": "A comprehensive air quality monitoring device that measures PM2.5, CO2, and temperature, providing real-time alerts for poor air quality.",
+        "problem_statement": "Indoor air pollution is a growing concern, especially in urban areas. People need an affordable way to monitor air quality in their homes and workplaces.",
+        "working_principle": "Multiple sensors collect data on air quality parameters. The microcontroller processes this data and displays it on an OLED screen. When pollution levels exceed safe thresholds, the system triggers visual and audio alerts.",
+        "difficulty": "Intermediate",
+        "estimated_cost": "₹1,250",
+        "required_components": ["ESP32", "PM2.5 Sensor", "CO2 Sensor", "DHT22 Temperature Sensor", "OLED Display", "Buzzer"],
+        "innovation_elements": ["Machine learning predictions", "Smart home integration", "Historical data logging"],
+        "scalability_options": ["Community air quality mapping", "Government database integration", "Mobile app with health recommendations"],
+        "tags": ["Environment", "Health", "IoT"],
+        "theme": "Environment"
+    },
+    {
+        "id": "smart-traffic-light",
+        "title": "Smart Traffic Light Controller",
+        "description": "An intelligent traffic management system that adjusts signal timing based on real-time traffic density using computer vision and sensors.",
+        "problem_statement": "Traditional traffic lights operate on fixed timers, causing unnecessary delays and fuel consumption when traffic patterns vary throughout the day.",
+        "working_principle": "Camera modules and ultrasonic sensors detect vehicle density at intersections. An AI algorithm processes this data to optimize signal timing, reducing wait times and improving traffic flow efficiency.",
+        "difficulty": "Advanced",
+        "estimated_cost": "₹2,100",
+        "required_components": ["Raspberry Pi 4", "Camera Module", "Ultrasonic Sensors", "Servo Motors", "LED Traffic Lights"],
+        "innovation_elements": ["Emergency vehicle priority detection", "Pedestrian crossing integration", "Weather-adaptive timing"],
+        "scalability_options": ["City-wide traffic optimization", "GPS navigation integration", "Public transportation priority"],
+        "tags": ["Transportation", "AI", "Smart City"],
+        "theme": "Transportation"
+    },
+    {
+        "id": "waste-segregation-robot",
+        "title": "Waste Segregation Robot",
+        "description": "An automated waste sorting system that uses computer vision to identify and separate recyclable materials from general waste.",
+        "problem_statement": "Improper waste segregation leads to environmental pollution and makes recycling processes inefficient. Manual sorting is time-consuming and often inaccurate.",
+        "working_principle": "A camera captures images of waste items on a conveyor belt. Machine learning algorithms classify materials as plastic, metal, paper, or organic waste. Robotic arms then sort items into appropriate bins.",
+        "difficulty": "Advanced",
+        "estimated_cost": "₹3,500",
+        "required_components": ["Raspberry Pi 4", "Camera Module", "Servo Motors", "Conveyor Belt", "Ultrasonic Sensors", "Robotic Arm Kit"],
+        "innovation_elements": ["Multi-spectral imaging", "Self-learning algorithm", "Waste management tracking integration"],
+        "scalability_options": ["Industrial-scale processing", "Household sorting units", "Smart city integration"],
+        "tags": ["Environment", "Robotics", "AI"],
+        "theme": "Environment"
+    },
+    {
+        "id": "health-monitoring-wearable",
+        "title": "Smart Health Monitoring Wearable",
+        "description": "A wearable device that continuously monitors vital signs including heart rate, body temperature, and activity levels with emergency alert features.",
+        "problem_statement": "Early detection of health issues is crucial, especially for elderly people living alone. Traditional monitoring requires frequent hospital visits and is not continuous.",
+        "working_principle": "Wearable sensors collect biometric data continuously. The device processes this information to detect anomalies and can send emergency alerts to family members or healthcare providers when critical thresholds are exceeded.",
+        "difficulty": "Intermediate",
+        "estimated_cost": "₹1,800",
+        "required_components": ["ESP32", "Heart Rate Sensor", "Temperature Sensor", "Accelerometer", "OLED Display", "Bluetooth Module"],
+        "innovation_elements": ["AI-powered health trend analysis", "Telemedicine integration", "Medication reminder system"],
+        "scalability_options": ["Hospital patient monitoring", "Insurance health tracking", "Elderly care facility integration"],
+        "tags": ["Healthcare", "IoT", "Wearables"],
+        "theme": "Healthcare"
+    }
+]
+
+# Compiled catalog file shared (memory-mapped) by every worker process. It is
+# rebuilt when the count or newest _id of project_templates changes; delete
+# the file to pick up templates edited in place.
+TEMPLATE_CATALOG_PATH = os.environ.get(
+    "TEMPLATE_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "template_catalog.bin")
+)
+BUILTIN_TEMPLATES_FINGERPRINT = hashlib.sha1(
+    json.dumps(PROJECT_TEMPLATES, sort_keys=True).encode("utf-8")
+).hexdigest()
+
+# Built-in templates only, until startup opens the shared catalog
+TEMPLATE_INDEX = TemplateCatalog.from_templates(PROJECT_TEMPLATES)
+
+@contextmanager
+def catalog_build_lock(path: str):
+    """Let only one worker at a time rebuild the catalog file"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+async def load_template_catalog() -> TemplateCatalog:
+    """Open the shared catalog file, building it first if the stored templates changed"""
+    collection = await get_collection("project_templates")
+    count = await collection.count_documents({})
+    if count == 0:
+        return TemplateCatalog.from_templates(PROJECT_TEMPLATES)
+    newest = await collection.find_one({}, projection={"_id": 1}, sort=[("_id", -1)])
+    version = hashlib.sha1(
+        f"{BUILTIN_TEMPLATES_FINGERPRINT}:{db.name}:{count}:{newest['_id']}".encode("utf-8")
+    ).hexdigest()
+    with catalog_build_lock(TEMPLATE_CATALOG_PATH):
+        if read_catalog_version(TEMPLATE_CATALOG_PATH) != version:
+            stored_templates = await collection.find({}, projection={"_id": 0}).to_list(None)
+            write_catalog_file(PROJECT_TEMPLATES + stored_templates, TEMPLATE_CATALOG_PATH, version)
+    return TemplateCatalog.open(TEMPLATE_CATALOG_PATH)
+
+# Diversified ranking only considers this many candidates per requested idea
+MMR_CANDIDATE_FACTOR = 4
+
+def jaccard_similarity(a: frozenset, b: frozenset) -> float:
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+def signature_similarity(a, b) -> float:
+    """Average of tag and component Jaccard similarity between two template signatures"""
+    return (jaccard_similarity(a[0], b[0]) + jaccard_similarity(a[1], b[1])) / 2
+
+def select_diverse_projects(candidates, count: int, relevance_weight: float):
+    """Pick `count` projects by maximal marginal relevance.
+
+    `candidates` is a list of (project, signature) pairs. Only the top
+    `count * MMR_CANDIDATE_FACTOR` candidates by match score are considered,
+    and each candidate's maximum similarity to the selected set is updated
+    incrementally, so the cost is O(count^2) regardless of catalog size.
+    """
+    pool = heapq.nlargest(count * MMR_CANDIDATE_FACTOR, candidates, key=lambda c: c[0]["match_score"])
+    max_similarity = [0.0] * len(pool)
+    remaining = list(range(len(pool)))
+    selected = []
+    while remaining and len(selected) < count:
+        best = max(
+            remaining,
+            key=lambda i: relevance_weight * pool[i][0]["match_score"] - (1 - relevance_weight) * max_similarity[i]
+        )
+        remaining.remove(best)
+        selected.append(pool[best][0])
+        for i in remaining:
+            max_similarity[i] = max(max_similarity[i], signature_similarity(pool[i][1], pool[best][1]))
+    return selected
+
+# Compact saved-idea storage: ideas created from a template only store the
+# fields that differ from it and are hydrated from the catalog on read
+COMPACT_IDEA_STORAGE = os.environ.get("COMPACT_IDEA_STORAGE", "false").lower() == "true"
+
+# Saved idea field -> template field
+TEMPLATE_IDEA_FIELDS = {
+    "title": "title",
+    "description": "description",
+    "problem_statement": "problem_statement",
+    "working_principle": "working_principle",
+    "difficulty": "difficulty",
+    "estimated_cost": "estimated_cost",
+    "components": "required_components",
+    "innovation_elements": "innovation_elements",
+    "scalability_options": "scalability_options",
+}
+
+def compact_idea_document(idea: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop fields that are identical to the idea's template"""
+    template = TEMPLATE_INDEX.get(idea.get("template_id"))
+    if not COMPACT_IDEA_STORAGE or not template:
+        return idea
+    return {
+        field: value for field, value in idea.items()
+        if field not in TEMPLATE_IDEA_FIELDS or value != template[TEMPLATE_IDEA_FIELDS[field]]
+    }
+
+def hydrate_idea_document(idea: Dict[str, Any], template: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fill fields omitted by compact storage back in from the template"""
+    template = template or TEMPLATE_INDEX.get(idea.get("template_id"))
+    if not template:
+        return idea
+    hydrated = dict(idea)
+    for field, template_field in TEMPLATE_IDEA_FIELDS.items():
+        hydrated.setdefault(field, template[template_field])
+    return hydrated
+
+async def hydrate_idea_documents(ideas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Hydrate a batch of ideas, falling back to project_templates for templates
+    missing from the catalog; ideas that still cannot be completed are skipped"""
+    missing = {
+        idea.get("template_id") for idea in ideas
+        if any(field not in idea for field in TEMPLATE_IDEA_FIELDS) and not TEMPLATE_INDEX.get(idea.get("template_id"))
+    }
+    stored_templates = {}
+    if missing - {None}:
+        collection = await get_collection("project_templates")
+        async for template in collection.find({"id": {"$in": list(missing - {None})}}, projection={"_id": 0}):
+            stored_templates[template["id"]] = template
+    hydrated = []
+    for idea in ideas:
+        document = hydrate_idea_document(idea, stored_templates.get(idea.get("template_id")))
+        if any(field not in document for field in TEMPLATE_IDEA_FIELDS):
+            report_missing_template(idea.get("template_id"))
+            continue
+        hydrated.append(document)
+    return hydrated
+
+# Template ids already reported as missing, so each is logged once per process
+reported_missing_templates = set()
+
+def report_missing_template(template_id: Optional[str]):
+    if template_id not in reported_missing_templates:
+        reported_missing_templates.add(template_id)
+        logger.warning("Skipping saved ideas for missing template %s", template_id)
+
+# Compact ideas matched through their template's text are capped at this many templates
+TEMPLATE_SEARCH_LIMIT = int(os.environ.get("TEMPLATE_SEARCH_LIMIT", "1000"))
+
 # Intelligent idea generation function
 async def generate_intelligent_ideas(request: IdeaGenerationRequest):
     """Generate project ideas using intelligent rule-based system"""
+    return rank_project_ideas(request)
+
+def rank_project_ideas(request: IdeaGenerationRequest) -> List[Dict[str, Any]]:
+    """CPU-bound part of idea generation; safe to run in a worker thread"""
     
-    # Base project templates with component mappings
-    project_templates = [
-        {
-            "title": "Smart Plant Watering System",
-            "description": "An automated irrigation system that monitors soil moisture and waters plants when needed using Arduino and sensors.",
-            "problem_statement": "Many people struggle to maintain proper watering schedules for their plants, leading to over-watering or under-watering, which can harm plant health.",
-            "working_principle": "The system uses a soil moisture sensor to detect when the soil becomes dry. When moisture levels drop below a threshold, the Arduino triggers a water pump to irrigate the plant.",
-            "difficulty": "Beginner",
-            "estimated_cost": "₹850",
-            "required_components": ["Arduino Uno", "Soil Moisture Sensor", "Water Pump", "LCD Display", "Relay Module"],
-            "innovation_elements": ["Automatic threshold adjustment", "SMS notifications", "Solar panel integration"],
-            "scalability_options": ["Multiple plant monitoring", "IoT connectivity", "Weather API integration"],
-            "tags": ["Agriculture", "IoT", "Automation"],
-            "theme": "Agriculture"
-        },
-        {
-            "title": "Air Quality Monitor with Alert System",
-            "description": "A comprehensive air quality monitoring device that measures PM2.5, CO2, and temperature, providing real-time alerts for poor air quality.",
-            "problem_statement": "Indoor air pollution is a growing concern, especially in urban areas. People need an affordable way to monitor air quality in their homes and workplaces.",
-            "working_principle": "Multiple sensors collect data on air quality parameters. The microcontroller processes this data and displays it on an OLED screen. When pollution levels exceed safe thresholds, the system triggers visual and audio alerts.",
-            "difficulty": "Intermediate",
-            "estimated_cost": "₹1,250",
-            "required_components": ["ESP32", "PM2.5 Sensor", "CO2 Sensor", "DHT22 Temperature Sensor", "OLED Display", "Buzzer"],
-            "innovation_elements": ["Machine learning predictions", "Smart home integration", "Historical data logging"],
-            "scalability_options": ["Community air quality mapping", "Government database integration", "Mobile app with health recommendations"],
-            "tags": ["Environment", "Health", "IoT"],
-            "theme": "Environment"
-        },
-        {
-            "title": "Smart Traffic Light Controller",
-            "description": "An intelligent traffic management system that adjusts signal timing based on real-time traffic density using computer vision and sensors.",
-            "problem_statement": "Traditional traffic lights operate on fixed timers, causing unnecessary delays and fuel consumption when traffic patterns vary throughout the day.",
-            "working_principle": "Camera modules and ultrasonic sensors detect vehicle density at intersections. An AI algorithm processes this data to optimize signal timing, reducing wait times and improving traffic flow efficiency.",
-            "difficulty": "Advanced",
-            "estimated_cost": "₹2,100",
-            "required_components": ["Raspberry Pi 4", "Camera Module", "Ultrasonic Sensors", "Servo Motors", "LED Traffic Lights"],
-            "innovation_elements": ["Emergency vehicle priority detection", "Pedestrian crossing integration", "Weather-adaptive timing"],
-            "scalability_options": ["City-wide traffic optimization", "GPS navigation integration", "Public transportation priority"],
-            "tags": ["Transportation", "AI", "Smart City"],
-            "theme": "Transportation"
-        },
-        {
-            "title": "Waste Segregation Robot",
-            "description": "An automated waste sorting system that uses computer vision to identify and separate recyclable materials from general waste.",
-            "problem_statement": "Improper waste segregation leads to environmental pollution and makes recycling processes inefficient. Manual sorting is time-consuming and often inaccurate.",
-            "working_principle": "A camera captures images of waste items on a conveyor belt. Machine learning algorithms classify materials as plastic, metal, paper, or organic waste. Robotic arms then sort items into appropriate bins.",
-            "difficulty": "Advanced",
-            "estimated_cost": "₹3,500",
-            "required_components": ["Raspberry Pi 4", "Camera Module", "Servo Motors", "Conveyor Belt", "Ultrasonic Sensors", "Robotic Arm Kit"],
-            "innovation_elements": ["Multi-spectral imaging", "Self-learning algorithm", "Waste management tracking integration"],
-            "scalability_options": ["Industrial-scale processing", "Household sorting units", "Smart city integration"],
-            "tags": ["Environment", "Robotics", "AI"],
-            "theme": "Environment"
-        },
-        {
-            "title": "Smart Health Monitoring Wearable",
-            "description": "A wearable device that continuously monitors vital signs including heart rate, body temperature, and activity levels with emergency alert features.",
-            "problem_statement": "Early detection of health issues is crucial, especially for elderly people living alone. Traditional monitoring requires frequent hospital visits and is not continuous.",
-            "working_principle": "Wearable sensors collect biometric data continuously. The device processes this information to detect anomalies and can send emergency alerts to family members or healthcare providers when critical thresholds are exceeded.",
-            "difficulty": "Intermediate",
-            "estimated_cost": "₹1,800",
-            "required_components": ["ESP32", "Heart Rate Sensor", "Temperature Sensor", "Accelerometer", "OLED Display", "Bluetooth Module"],
-            "innovation_elements": ["AI-powered health trend analysis", "Telemedicine integration", "Medication reminder system"],
-            "scalability_options": ["Hospital patient monitoring", "Insurance health tracking", "Elderly care facility integration"],
-            "tags": ["Healthcare", "IoT", "Wearables"],
-            "theme": "Healthcare"
-        }
-    ]
-    
-    # Filter projects based on available components
-    selected_components = set(request.selected_components)
-    matching_projects = []
+    # Score templates sharing components with the selection from the index alone
+    skill_level = request.user_preferences.skill_level if request.user_preferences else None
+    candidates = []
     
-    for template in project_templates:
+    for position, hits in TEMPLATE_INDEX.component_hits(request.selected_components).items():
         # Calculate component match score
-        required_components = set(template["required_components"])
-        match_score = len(selected_components.intersection(required_components)) / len(required_components)
+        match_score = hits / TEMPLATE_INDEX.required_count(position)
         
         # Include projects with at least 30% component match
         if match_score >= 0.3:
-            # Create project instance
-            project = {
-                "id": str(uuid.uuid4()),
-                "title": template["title"],
-                "description": template["description"],
-                "problem_statement": template["problem_statement"],
-                "working_principle": template["working_principle"],
-                "difficulty": template["difficulty"],
-                "estimated_cost": template["estimated_cost"],
-                "components": template["required_components"],
-                "innovation_elements": template["innovation_elements"],
-                "scalability_options": template["scalability_options"],
-                "availability": "Available" if match_score >= 0.7 else "Partially Available",
-                "created_at": datetime.now(),
-                "updated_at": datetime.now(),
-                "is_favorite": False,
-                "tags": template["tags"],
-                "notes": "",
-                "match_score": match_score
-            }
-            matching_projects.append(project)
+            score = match_score
+            # Adjust scoring based on difficulty preference
+            if skill_level and TEMPLATE_INDEX.difficulty(position) == skill_level:
+                score += 0.2
+            candidates.append((score, position, match_score))
     
-    # Sort by match score and user preferences
-    if request.user_preferences:
-        # Adjust scoring based on difficulty preference
-        for project in matching_projects:
-            if project["difficulty"] == request.user_preferences.skill_level:
-                project["match_score"] += 0.2
+    # Only the top results (or the MMR candidate pool) are turned into projects;
+    # ties keep catalog order
+    result_count = min(request.count, len(candidates))
+    pool_size = result_count * MMR_CANDIDATE_FACTOR if request.diversify else result_count
+    top_candidates = heapq.nlargest(pool_size, candidates, key=lambda c: (c[0], -c[1]))
     
-    # Sort by match score (descending) and return top results
-    matching_projects.sort(key=lambda x: x["match_score"], reverse=True)
+    matching_projects = []
+    matching_signatures = []
+    for score, position, match_score in top_candidates:
+        template = TEMPLATE_INDEX.template(position)
+        # Create project instance
+        project = {
+            "id": str(uuid.uuid4()),
+            "template_id": template["id"],
+            "title": template["title"],
+            "description": template["description"],
+            "problem_statement": template["problem_statement"],
+            "working_principle": template["working_principle"],
+            "difficulty": template["difficulty"],
+            "estimated_cost": template["estimated_cost"],
+            "components": template["required_components"],
+            "innovation_elements": template["innovation_elements"],
+            "scalability_options": template["scalability_options"],
+            "availability": "Available" if match_score >= 0.7 else "Partially Available",
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+            "is_favorite": False,
+            "tags": template["tags"],
+            "notes": "",
+            "match_score": score
+        }
+        matching_projects.append(project)
+        matching_signatures.append(TEMPLATE_INDEX.signature(position))
     
     # Return requested number of projects (default 5)
-    result_count = min(request.count, len(matching_projects))
-    return matching_projects[:result_count] if matching_projects else [
+    if request.diversify:
+        # Trade match score against similarity to already selected projects
+        matching_projects = select_diverse_projects(
+            list(zip(matching_projects, matching_signatures)), result_count, request.diversity_lambda
+        )
+    return matching_projects[:result_count] if candidates else [
         # Fallback project if no matches found
         {
             "id": str(uuid.uuid4()),
@@ -235,6 +1007,107 @@ async def generate_intelligent_ideas(request: IdeaGenerationRequest):
         }
     ]
 
+# Background generation jobs. Job state lives in the generation_jobs
+# collection so any worker process can answer polls and event streams;
+# the in-process queue only admits work for this process's executor.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_QUEUE_LIMIT = int(os.environ.get("JOB_QUEUE_LIMIT", "100"))
+JOB_RESULT_TTL_SECONDS = int(os.environ.get("JOB_RESULT_TTL_SECONDS", "600"))
+# Queued or running jobs left behind by a stopped worker expire after this long
+JOB_MAX_AGE_SECONDS = int(os.environ.get("JOB_MAX_AGE_SECONDS", "3600"))
+# Stored jobs (all users) before new submissions are refused
+JOB_STORE_LIMIT = int(os.environ.get("JOB_STORE_LIMIT", "10000"))
+# Finished jobs kept per user within the TTL
+JOB_HISTORY_PER_USER = int(os.environ.get("JOB_HISTORY_PER_USER", "20"))
+JOB_EVENTS_POLL_SECONDS = 0.5
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+FINISHED_JOB_STATUSES = (JobStatus.COMPLETED.value, JobStatus.FAILED.value)
+
+# Created on startup: the queue only admits jobs, generation runs in the executor
+job_queue: Optional[asyncio.Queue] = None
+job_executor: Optional[ThreadPoolExecutor] = None
+job_workers: List[asyncio.Task] = []
+
+def job_snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "ideas": job["ideas"],
+        "error": job["error"],
+    }
+
+async def trim_job_history(user_id: str):
+    """Drop a user's oldest finished jobs beyond JOB_HISTORY_PER_USER"""
+    collection = await get_collection("generation_jobs")
+    stale = await collection.find(
+        {"user_id": user_id, "status": {"$in": list(FINISHED_JOB_STATUSES)}}, projection={"id": 1, "_id": 0}
+    ).sort("finished_at", -1).skip(JOB_HISTORY_PER_USER).to_list(None)
+    if stale:
+        await collection.delete_many({"id": {"$in": [job["id"] for job in stale]}})
+
+async def run_generation_jobs():
+    """Worker loop: generate queued jobs off the event loop and store their results"""
+    loop = asyncio.get_running_loop()
+    collection = await get_collection("generation_jobs")
+    while True:
+        job_id, request, user_id = await job_queue.get()
+        try:
+            await collection.update_one({"id": job_id}, {"$set": {"status": JobStatus.RUNNING.value}})
+            try:
+                ideas = await loop.run_in_executor(job_executor, rank_project_ideas, request)
+                result = {"status": JobStatus.COMPLETED.value, "ideas": ideas}
+            except Exception as e:
+                result = {"status": JobStatus.FAILED.value, "error": str(e)}
+            finished_at = datetime.now()
+            await collection.update_one({"id": job_id}, {"$set": {
+                **result,
+                "finished_at": finished_at,
+                "expires_at": finished_at + timedelta(seconds=JOB_RESULT_TTL_SECONDS)
+            }})
+            await trim_job_history(user_id)
+        except Exception:
+            logger.exception("Generation job %s could not be stored", job_id)
+        finally:
+            job_queue.task_done()
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def stream_job_events(job_id: str, user_id: str):
+    """Server-Sent Events: one `idea` event per idea, then a final `done` event.
+
+    Polls the stored job, so the stream works from any worker process.
+    """
+    collection = await get_collection("generation_jobs")
+    sent = 0
+    idle = 0.0
+    while True:
+        job = await collection.find_one(
+            {"id": job_id, "user_id": user_id}, projection={"status": 1, "ideas": 1, "error": 1, "_id": 0}
+        )
+        if job is None:
+            yield format_sse("done", {"status": JobStatus.FAILED, "error": "Job expired"})
+            return
+        for idea in job["ideas"][sent:]:
+            yield format_sse("idea", idea)
+            sent += 1
+        if job["status"] in FINISHED_JOB_STATUSES:
+            yield format_sse("done", {"status": job["status"], "error": job["error"]})
+            return
+        await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+        idle += JOB_EVENTS_POLL_SECONDS
+        if idle >= JOB_EVENTS_KEEPALIVE_SECONDS:
+            idle = 0.0
+            yield ": keepalive\n\n"
+
 # API Routes
 
 @app.get("/")
@@ -247,9 +1120,13 @@ async def health_check():
 
 # Component endpoints
 @app.get("/api/components", response_model=List[Component])
-async def get_components():
+async def get_components(request: Request, response: Response):
     """Get all available components"""
     collection = await get_collection("components")
+    etag = await collection_etag(collection, {}, "created_at")
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     components = await collection.find().to_list(None)
     return [Component(**comp) for comp in components]
 
@@ -271,145 +1148,327 @@ async def get_components_by_category(category: str):
 
 # User Preferences endpoints
 @app.get("/api/preferences", response_model=UserPreferences)
-async def get_user_preferences():
+async def get_user_preferences(user_id: str = Depends(get_user_id)):
     """Get user preferences"""
     collection = await get_collection("user_preferences")
-    prefs = await collection.find_one({})
+    prefs = await collection.find_one({"user_id": user_id})
     if not prefs:
         # Return default preferences
-        default_prefs = UserPreferences()
+        default_prefs = UserPreferences(user_id=user_id)
         await collection.insert_one(default_prefs.dict())
         return default_prefs
     return UserPreferences(**prefs)
 
 @app.post("/api/preferences", response_model=UserPreferences)
-async def save_user_preferences(preferences: UserPreferences):
+async def save_user_preferences(preferences: UserPreferences, user_id: str = Depends(get_user_id)):
     """Save user preferences"""
     collection = await get_collection("user_preferences")
+    preferences.user_id = user_id
     preferences.last_updated = datetime.now()
-    await collection.replace_one({}, preferences.dict(), upsert=True)
+    await collection.replace_one({"user_id": user_id}, preferences.dict(), upsert=True)
     return preferences
 
 # Saved Ideas endpoints
 @app.get("/api/ideas", response_model=List[SavedIdea])
-async def get_saved_ideas():
+async def get_saved_ideas(request: Request, response: Response, user_id: str = Depends(get_user_id)):
     """Get all saved ideas"""
     collection = await get_collection("saved_ideas")
-    ideas = await collection.find().sort("created_at", -1).to_list(None)
-    return [SavedIdea(**idea) for idea in ideas]
+    etag = await collection_etag(collection, {"user_id": user_id}, "updated_at")
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    ideas = await collection.find({"user_id": user_id}).sort("created_at", -1).to_list(None)
+    return [SavedIdea(**idea) for idea in await hydrate_idea_documents(ideas)]
 
 @app.post("/api/ideas", response_model=SavedIdea)
-async def save_idea(idea: SavedIdea):
+async def save_idea(idea: SavedIdea, user_id: str = Depends(get_user_id)):
     """Save a new idea"""
     collection = await get_collection("saved_ideas")
+    idea.user_id = user_id
     idea.updated_at = datetime.now()
-    await collection.insert_one(idea.dict())
+    async with aggregate_change(user_id) as delta:
+        await collection.insert_one(compact_idea_document(idea.dict()))
+        delta.update(idea_contribution(idea.dict()))
     
     # Update stats
-    await increment_stat("ideas_generated")
+    await increment_stat(user_id, "ideas_generated")
     return idea
 
 @app.put("/api/ideas/{idea_id}", response_model=SavedIdea)
-async def update_idea(idea_id: str, idea: SavedIdea):
+async def update_idea(idea_id: str, idea: SavedIdea, user_id: str = Depends(get_user_id)):
     """Update an existing idea"""
     collection = await get_collection("saved_ideas")
+    idea.user_id = user_id
     idea.updated_at = datetime.now()
-    result = await collection.replace_one({"id": idea_id}, idea.dict())
-    if result.matched_count == 0:
+    async with aggregate_change(user_id) as delta:
+        previous = await collection.find_one_and_replace(
+            {"user_id": user_id, "id": idea_id}, compact_idea_document(idea.dict())
+        )
+        if previous:
+            delta.update(idea_contribution(idea.dict()))
+            delta.subtract(idea_contribution(hydrate_idea_document(previous)))
+    if not previous:
         raise HTTPException(status_code=404, detail="Idea not found")
     return idea
 
 @app.delete("/api/ideas/{idea_id}")
-async def delete_idea(idea_id: str):
+async def delete_idea(idea_id: str, user_id: str = Depends(get_user_id)):
     """Delete an idea"""
     collection = await get_collection("saved_ideas")
-    result = await collection.delete_one({"id": idea_id})
-    if result.deleted_count == 0:
+    async with aggregate_change(user_id) as delta:
+        previous = await collection.find_one_and_delete({"user_id": user_id, "id": idea_id})
+        if previous:
+            delta.subtract(idea_contribution(hydrate_idea_document(previous)))
+    if not previous:
         raise HTTPException(status_code=404, detail="Idea not found")
     return {"message": "Idea deleted successfully"}
 
 @app.patch("/api/ideas/{idea_id}/favorite")
-async def toggle_favorite(idea_id: str, is_favorite: bool):
+async def toggle_favorite(idea_id: str, is_favorite: bool, user_id: str = Depends(get_user_id)):
     """Toggle favorite status of an idea"""
     collection = await get_collection("saved_ideas")
-    result = await collection.update_one(
-        {"id": idea_id}, 
-        {"$set": {"is_favorite": is_favorite, "updated_at": datetime.now()}}
-    )
-    if result.matched_count == 0:
+    async with aggregate_change(user_id) as delta:
+        previous = await collection.find_one_and_update(
+            {"user_id": user_id, "id": idea_id}, 
+            {"$set": {"is_favorite": is_favorite, "updated_at": datetime.now()}}
+        )
+        if previous:
+            delta["favorites"] += int(is_favorite) - int(bool(previous.get("is_favorite")))
+    if not previous:
         raise HTTPException(status_code=404, detail="Idea not found")
     return {"message": "Favorite status updated"}
 
-@app.get("/api/ideas/search")
-async def search_ideas(query: str):
-    """Search ideas by title, description, or tags"""
+@app.get("/api/ideas/search", dependencies=[Depends(search_admission)])
+async def search_ideas(query: str, response: Response, user_id: str = Depends(get_user_id)):
+    """Search ideas by title or description (query text starting at a word) or exact tag"""
     collection = await get_collection("saved_ideas")
-    ideas = await collection.find({
-        "$or": [
-            {"title": {"$regex": query, "$options": "i"}},
-            {"description": {"$regex": query, "$options": "i"}},
-            {"tags": {"$in": [query]}}
-        ]
-    }).to_list(None)
-    return [SavedIdea(**idea) for idea in ideas]
+    pattern = search_pattern(query)
+    clauses = [
+        {"title": {"$regex": pattern, "$options": "i"}},
+        {"description": {"$regex": pattern, "$options": "i"}},
+        {"tags": {"$in": [query]}},
+    ]
+    if COMPACT_IDEA_STORAGE:
+        # Compactly stored ideas inherit title and description from their template
+        for field in ("title", "description"):
+            template_ids = TEMPLATE_INDEX.search(field, query, TEMPLATE_SEARCH_LIMIT + 1)
+            if len(template_ids) > TEMPLATE_SEARCH_LIMIT:
+                response.headers["X-Search-Truncated"] = "true"
+                template_ids = template_ids[:TEMPLATE_SEARCH_LIMIT]
+            if template_ids:
+                clauses.append({"template_id": {"$in": template_ids}, field: {"$exists": False}})
+    ideas = await collection.find({"user_id": user_id, "$or": clauses}).to_list(None)
+    return [SavedIdea(**idea) for idea in await hydrate_idea_documents(ideas)]
 
 # AI Idea Generation endpoint
-@app.post("/api/generate-ideas")
+@app.post("/api/generate-ideas", dependencies=[Depends(generate_admission)])
 async def generate_ideas(request: IdeaGenerationRequest):
     """Generate project ideas using AI based on selected components"""
-    # This will be implemented with actual AI integration
-    # For now, return mock data similar to Flutter app
-    mock_ideas = [
-        {
-            "id": str(uuid.uuid4()),
-            "title": "Smart Plant Watering System",
-            "description": "An automated irrigation system that monitors soil moisture and waters plants when needed using Arduino and sensors.",
-            "problem_statement": "Many people struggle to maintain proper watering schedules for their plants, leading to over-watering or under-watering, which can harm plant health.",
-            "working_principle": "The system uses a soil moisture sensor to detect when the soil becomes dry. When moisture levels drop below a threshold, the Arduino triggers a water pump to irrigate the plant.",
-            "difficulty": "Beginner",
-            "estimated_cost": "₹850",
-            "components": ["Arduino Uno", "Soil Moisture Sensor", "Water Pump", "LCD Display", "Relay Module"],
-            "innovation_elements": ["Automatic threshold adjustment", "SMS notifications", "Solar panel integration"],
-            "scalability_options": ["Multiple plant monitoring", "IoT connectivity", "Weather API integration"],
-            "availability": "Available",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-            "is_favorite": False,
-            "tags": ["Agriculture", "IoT", "Automation"],
-            "notes": ""
-        }
-    ]
-    
-    return mock_ideas
+    return await generate_intelligent_ideas(request)
+
+# Asynchronous generation jobs
+@app.post("/api/jobs/generate-ideas", status_code=202, dependencies=[Depends(generate_admission)])
+async def submit_generation_job(request: IdeaGenerationRequest, user_id: str = Depends(get_user_id)):
+    """Queue idea generation and return a job id to poll or stream"""
+    collection = await get_collection("generation_jobs")
+    if job_queue.full() or await collection.estimated_document_count() >= JOB_STORE_LIMIT:
+        raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "5"})
+    created_at = datetime.now()
+    job = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "status": JobStatus.QUEUED.value,
+        "ideas": [],
+        "error": None,
+        "created_at": created_at,
+        "finished_at": None,
+        "expires_at": created_at + timedelta(seconds=JOB_MAX_AGE_SECONDS)
+    }
+    await collection.insert_one(job)
+    try:
+        job_queue.put_nowait((job["id"], request, user_id))
+    except asyncio.QueueFull:
+        await collection.delete_one({"id": job["id"]})
+        raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "5"})
+    return {"job_id": job["id"], "status": job["status"]}
+
+@app.get("/api/jobs/{job_id}")
+async def get_generation_job(job_id: str, user_id: str = Depends(get_user_id)):
+    """Get the status and ideas produced so far by a generation job"""
+    collection = await get_collection("generation_jobs")
+    job = await collection.find_one({"id": job_id, "user_id": user_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_snapshot(job)
+
+@app.get("/api/jobs/{job_id}/events")
+async def get_generation_job_events(job_id: str, user_id: str = Depends(get_user_id)):
+    """Stream a generation job's ideas as Server-Sent Events"""
+    collection = await get_collection("generation_jobs")
+    if not await collection.find_one({"id": job_id, "user_id": user_id}, projection={"_id": 1}):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        stream_job_events(job_id, user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+# Admission control metrics
+@app.get("/api/admission")
+async def get_admission_stats():
+    """Queue depth and rejection counts for the rate-limited routes"""
+    return [generate_admission.stats(), search_admission.stats()]
 
 # User Stats endpoints
 @app.get("/api/stats", response_model=UserStats)
-async def get_user_stats():
+async def get_user_stats(user_id: str = Depends(get_user_id)):
     """Get user statistics"""
     collection = await get_collection("user_stats")
-    stats = await collection.find_one({})
+    stats = await collection.find_one({"user_id": user_id})
     if not stats:
-        default_stats = UserStats()
+        default_stats = UserStats(user_id=user_id)
         await collection.insert_one(default_stats.dict())
         return default_stats
     return UserStats(**stats)
 
-async def increment_stat(stat_key: str, increment: int = 1):
+@app.get("/api/stats/breakdown")
+async def get_stats_breakdown(user_id: str = Depends(get_user_id)):
+    """Get idea counts by tag, difficulty and favorite status"""
+    collection = await get_collection("idea_aggregates")
+    aggregates = await collection.find_one({"user_id": user_id})
+    if not aggregates or aggregates.get("needs_backfill"):
+        # First request for this user: build the aggregates once
+        await reconcile_aggregates(user_id)
+        aggregates = await collection.find_one({"user_id": user_id}) or {}
+    return format_breakdown(aggregates)
+
+@app.post("/api/stats/breakdown/reconcile")
+async def reconcile_stats_breakdown(user_id: str = Depends(get_user_id)):
+    """Recompute the breakdown from saved ideas and report any drift"""
+    return await reconcile_aggregates(user_id)
+
+# Unique indexes created by initialize_database, per user-scoped collection
+USER_SCOPED_UNIQUE_INDEXES = {
+    "user_preferences": [("user_id", 1)],
+    "saved_ideas": [("user_id", 1), ("id", 1)],
+    "user_stats": [("user_id", 1)],
+}
+
+async def user_scoping_migrated() -> bool:
+    """The legacy migration has run once every unique per-user index exists"""
+    for collection_name, keys in USER_SCOPED_UNIQUE_INDEXES.items():
+        collection = await get_collection(collection_name)
+        indexes = await collection.index_information()
+        fields = [field for field, _ in keys]
+        if not any(index.get("unique") and [field for field, _ in index["key"]] == fields
+                   for index in indexes.values()):
+            return False
+    return True
+
+async def migrate_legacy_user_documents():
+    """Assign documents written before user scoping to the default user and
+    collapse duplicates so the unique per-user indexes can be built"""
+    for collection_name in USER_SCOPED_UNIQUE_INDEXES:
+        collection = await get_collection(collection_name)
+        await collection.update_many(
+            {"user_id": {"$exists": False}}, {"$set": {"user_id": DEFAULT_USER_ID}}
+        )
+    await merge_duplicate_documents("user_preferences", ["user_id"], "last_updated")
+    await merge_duplicate_documents("user_stats", ["user_id"], "last_active_date", summed_fields=STAT_COUNTERS)
+    await merge_duplicate_documents("saved_ideas", ["user_id", "id"], "updated_at")
+
+# Counters maintained by increment_stat
+STAT_COUNTERS = ("ideas_generated", "projects_completed", "components_scanned", "days_active")
+
+async def merge_duplicate_documents(collection_name: str, key_fields: List[str], newest_field: str,
+                                    summed_fields=()):
+    """Keep only the newest document per key, adding up `summed_fields` into it"""
+    collection = await get_collection(collection_name)
+    duplicates = await collection.aggregate([
+        {"$group": {"_id": {field: f"${field}" for field in key_fields}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True).to_list(None)
+    for duplicate in duplicates:
+        documents = await collection.find(duplicate["_id"]).sort(newest_field, -1).to_list(None)
+        keep, extra = documents[0], documents[1:]
+        if summed_fields:
+            totals = {field: sum(doc.get(field) or 0 for doc in documents) for field in summed_fields}
+            await collection.update_one({"_id": keep["_id"]}, {"$set": totals})
+        await collection.delete_many({"_id": {"$in": [doc["_id"] for doc in extra]}})
+
+async def increment_stat(user_id: str, stat_key: str, increment: int = 1):
     """Increment a user statistic"""
     collection = await get_collection("user_stats")
     await collection.update_one(
-        {},
+        {"user_id": user_id},
         {
             "$inc": {stat_key: increment},
-            "$set": {"last_active_date": datetime.now()}
+            "$set": {"last_active_date": datetime.now()},
+            "$setOnInsert": {"id": str(uuid.uuid4())}
         },
         upsert=True
     )
 
+# Start and stop the generation job workers
+@app.on_event("startup")
+async def start_job_workers():
+    global job_queue, job_executor
+    job_queue = asyncio.Queue(maxsize=JOB_QUEUE_LIMIT)
+    job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="generation-job")
+    for _ in range(JOB_WORKERS):
+        job_workers.append(asyncio.create_task(run_generation_jobs()))
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    for worker in job_workers:
+        worker.cancel()
+    job_workers.clear()
+    job_executor.shutdown(wait=False)
+
+# Periodic aggregate reconciliation
+aggregate_reconciler: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_aggregate_reconciliation():
+    if AGGREGATE_RECONCILE_INTERVAL_SECONDS > 0:
+        aggregate_reconciler.append(asyncio.create_task(run_aggregate_reconciliation()))
+
+@app.on_event("shutdown")
+async def stop_aggregate_reconciliation():
+    for task in aggregate_reconciler:
+        task.cancel()
+    aggregate_reconciler.clear()
+
 # Initialize default data
 @app.on_event("startup")
 async def initialize_database():
     """Initialize database with default data"""
+    # One-off migration of documents written before user scoping; skipped
+    # once the unique per-user indexes exist so restarts don't rescan
+    if not await user_scoping_migrated():
+        await migrate_legacy_user_documents()
+    
+    # Per-user indexes so every scoped query is a single index lookup
+    preferences_collection = await get_collection("user_preferences")
+    await preferences_collection.create_index("user_id", unique=True)
+    ideas_collection = await get_collection("saved_ideas")
+    await ideas_collection.create_index([("user_id", 1), ("id", 1)], unique=True)
+    await ideas_collection.create_index([("user_id", 1), ("created_at", -1)])
+    await ideas_collection.create_index([("user_id", 1), ("updated_at", -1)])
+    stats_collection = await get_collection("user_stats")
+    await stats_collection.create_index("user_id", unique=True)
+    aggregates_collection = await get_collection("idea_aggregates")
+    await aggregates_collection.create_index("user_id", unique=True)
+    jobs_collection = await get_collection("generation_jobs")
+    await jobs_collection.create_index("id", unique=True)
+    await jobs_collection.create_index([("user_id", 1), ("finished_at", -1)])
+    # Finished jobs expire JOB_RESULT_TTL_SECONDS after finishing, unfinished ones after JOB_MAX_AGE_SECONDS
+    await jobs_collection.create_index("expires_at", expireAfterSeconds=0)
+    
+    # Extend the built-in template catalog with stored templates (e.g. generated fixtures)
+    global TEMPLATE_INDEX
+    TEMPLATE_INDEX = await load_template_catalog()
+    
     # Initialize components collection
     components_collection = await get_collection("components")
     if await components_collection.count_documents({}) == 0:
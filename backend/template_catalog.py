@@ -0,0 +1,326 @@
+"""
+Read-only, memory-mapped project template catalog.
+
+The compiled catalog (template documents plus the component -> template
+inverted index) is written once to a single file and every uvicorn worker
+maps it with mmap. Lookups read straight from the shared mapping, so the
+catalog lives once in the page cache instead of once per worker, and a new
+worker only has to open the file rather than rebuild the index.
+
+File layout (little-endian):
+    magic (8 bytes) | header length (uint64) | JSON header | 8-byte aligned sections
+
+The JSON header records the catalog version and, for every section, its
+offset, length and array type code.
+
+Besides the component and id indexes, the lowercase words of every title
+and description are indexed so text search never scans the catalog.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MAGIC = b"ATALCAT3"
+
+# Decoded template documents kept per worker
+TEMPLATE_CACHE_SIZE = 1024
+
+# Template fields with a word index for text search
+TEXT_FIELDS = ("title", "description")
+
+def text_words(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def search_pattern(query: str) -> str:
+    """Case-insensitive pattern for `query` as literal text starting at a word boundary.
+
+    Used both as a MongoDB $regex for fully stored ideas and by
+    TemplateCatalog.search, so both storage modes match the same ideas.
+    """
+    return r"\b" + re.escape(query)
+
+
+def _sorted_keys(keyed_positions: Dict[str, List[int]]) -> List[str]:
+    """Keys in index order; a key's position is its id in signature arrays"""
+    return sorted(keyed_positions, key=lambda key: key.encode("utf-8"))
+
+
+def _inverted_index(keyed_positions: Dict[str, List[int]]) -> Dict[str, Any]:
+    """Sorted keys plus CSR postings for an inverted index section"""
+    keys = _sorted_keys(keyed_positions)
+    key_blob = bytearray()
+    key_offsets = array("Q", [0])
+    posting_offsets = array("I", [0])
+    postings = array("I")
+    for key in keys:
+        key_blob += key.encode("utf-8")
+        key_offsets.append(len(key_blob))
+        postings.extend(sorted(set(keyed_positions[key])))
+        posting_offsets.append(len(postings))
+    return {
+        "key_offsets": key_offsets,
+        "key_blob": bytes(key_blob),
+        "posting_offsets": posting_offsets,
+        "postings": postings,
+    }
+
+
+def build_catalog_bytes(templates: List[Dict[str, Any]], version: str = "") -> bytes:
+    """Compile templates into the catalog file format"""
+    template_blob = bytearray()
+    template_offsets = array("Q", [0])
+    required_counts = array("I")
+    difficulty_levels: List[str] = []
+    difficulties = array("B")
+    by_component: Dict[str, List[int]] = {}
+    by_id: Dict[str, List[int]] = {}
+    by_tag: Dict[str, List[int]] = {}
+    by_word: Dict[str, Dict[str, List[int]]] = {field: {} for field in TEXT_FIELDS}
+    for position, template in enumerate(templates):
+        template_blob += json.dumps(template, ensure_ascii=False, default=str).encode("utf-8")
+        template_offsets.append(len(template_blob))
+        required = set(template["required_components"])
+        required_counts.append(len(required))
+        if template["difficulty"] not in difficulty_levels:
+            difficulty_levels.append(template["difficulty"])
+        difficulties.append(difficulty_levels.index(template["difficulty"]))
+        for component in required:
+            by_component.setdefault(component, []).append(position)
+        by_id.setdefault(template["id"], []).append(position)
+        for tag in set(template["tags"]):
+            by_tag.setdefault(tag, []).append(position)
+        for field in TEXT_FIELDS:
+            for word in set(text_words(template[field])):
+                by_word[field].setdefault(word, []).append(position)
+
+    # Precomputed diversity signatures: each template's tag and component ids
+    signature_sections = {}
+    for name, keyed_positions, field in (("tags", by_tag, "tags"), ("components", by_component, "required_components")):
+        key_ids = {key: i for i, key in enumerate(_sorted_keys(keyed_positions))}
+        offsets, ids = array("I", [0]), array("I")
+        for template in templates:
+            ids.extend(sorted({key_ids[key] for key in template[field]}))
+            offsets.append(len(ids))
+        signature_sections[f"signature_{name}.offsets"] = offsets
+        signature_sections[f"signature_{name}.ids"] = ids
+
+    sections = {
+        "template_offsets": template_offsets,
+        "template_blob": bytes(template_blob),
+        "required_counts": required_counts,
+        "difficulties": difficulties,
+        **signature_sections,
+    }
+    indexes = {"components": by_component, "ids": by_id, "tags": by_tag}
+    indexes.update({f"{field}_words": by_word[field] for field in TEXT_FIELDS})
+    for name, keyed_positions in indexes.items():
+        for part, data in _inverted_index(keyed_positions).items():
+            sections[f"{name}.{part}"] = data
+
+    header = {
+        "version": version,
+        "count": len(templates),
+        "difficulty_levels": difficulty_levels,
+        "sections": {},
+    }
+    body = bytearray()
+    for name, data in sections.items():
+        body += b"\0" * (-len(body) % 8)
+        raw = data.tobytes() if isinstance(data, array) else data
+        header["sections"][name] = {
+            "offset": len(body),
+            "length": len(raw),
+            "typecode": data.typecode if isinstance(data, array) else "B",
+        }
+        body += raw
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * (-(len(MAGIC) + 8 + len(header_bytes)) % 8)
+    return MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes + bytes(body)
+
+
+def write_catalog_file(templates: List[Dict[str, Any]], path: str, version: str = ""):
+    """Atomically write a compiled catalog; workers holding the old file keep their mapping"""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(build_catalog_bytes(templates, version))
+    os.replace(temporary, path)
+
+
+def read_catalog_version(path: str) -> Optional[str]:
+    """Version recorded in an existing catalog file, or None if it is missing or unreadable"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            return json.loads(f.read(header_length))["version"]
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+class _InvertedSection:
+    """Sorted string keys with a uint32 postings list per key"""
+
+    def __init__(self, catalog: "TemplateCatalog", name: str):
+        self.key_offsets = catalog._section(f"{name}.key_offsets")
+        self.key_blob = catalog._section(f"{name}.key_blob")
+        self.posting_offsets = catalog._section(f"{name}.posting_offsets")
+        self.postings_array = catalog._section(f"{name}.postings")
+
+    def __len__(self) -> int:
+        return len(self.key_offsets) - 1
+
+    def key_bytes(self, i: int) -> bytes:
+        return bytes(self.key_blob[self.key_offsets[i]:self.key_offsets[i + 1]])
+
+    def lower_bound(self, target: bytes) -> int:
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_bytes(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, key: str) -> int:
+        target = key.encode("utf-8")
+        i = self.lower_bound(target)
+        return i if i < len(self) and self.key_bytes(i) == target else -1
+
+    def postings(self, i: int):
+        return self.postings_array[self.posting_offsets[i]:self.posting_offsets[i + 1]]
+
+    def prefix_postings(self, prefix: str) -> set:
+        """Union of the postings of every key starting with `prefix`"""
+        target = prefix.encode("utf-8")
+        positions = set()
+        i = self.lower_bound(target)
+        while i < len(self) and self.key_bytes(i).startswith(target):
+            positions.update(self.postings(i))
+            i += 1
+        return positions
+
+
+class TemplateCatalog:
+    """Project templates and their component index, read from a compiled catalog buffer.
+
+    `buffer` is either an mmap of a catalog file (shared across workers) or
+    an in-memory bytes object for small catalogs.
+    """
+
+    def __init__(self, buffer, path: Optional[str] = None):
+        self.path = path
+        self.buffer = buffer
+        view = memoryview(buffer)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a template catalog")
+        (header_length,) = struct.unpack_from("<Q", buffer, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(view[start:start + header_length]))
+        self.version = header["version"]
+        self.count = header["count"]
+        self._body = view[start + header_length:]
+        self._sections = header["sections"]
+        self._template_offsets = self._section("template_offsets")
+        self._template_blob = self._section("template_blob")
+        self._required_counts = self._section("required_counts")
+        self._difficulty_levels = header["difficulty_levels"]
+        self._difficulties = self._section("difficulties")
+        self._components = _InvertedSection(self, "components")
+        self._ids = _InvertedSection(self, "ids")
+        self._signature_tags = (self._section("signature_tags.offsets"), self._section("signature_tags.ids"))
+        self._signature_components = (
+            self._section("signature_components.offsets"), self._section("signature_components.ids")
+        )
+        self._words = {field: _InvertedSection(self, f"{field}_words") for field in TEXT_FIELDS}
+        self.template = lru_cache(maxsize=TEMPLATE_CACHE_SIZE)(self._load_template)
+
+    @classmethod
+    def from_templates(cls, templates: List[Dict[str, Any]], version: str = "") -> "TemplateCatalog":
+        return cls(build_catalog_bytes(templates, version))
+
+    @classmethod
+    def open(cls, path: str) -> "TemplateCatalog":
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file object is closed
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    def _section(self, name: str):
+        meta = self._sections[name]
+        raw = self._body[meta["offset"]:meta["offset"] + meta["length"]]
+        return raw if meta["typecode"] == "B" else raw.cast(meta["typecode"])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _load_template(self, position: int) -> Dict[str, Any]:
+        start, end = self._template_offsets[position], self._template_offsets[position + 1]
+        return json.loads(bytes(self._template_blob[start:end]))
+
+    def templates(self) -> Iterable[Dict[str, Any]]:
+        for position in range(self.count):
+            yield self.template(position)
+
+    def required_count(self, position: int) -> int:
+        return self._required_counts[position]
+
+    def difficulty(self, position: int) -> str:
+        return self._difficulty_levels[self._difficulties[position]]
+
+    def signature(self, position: int) -> Tuple[frozenset, frozenset]:
+        """(tag ids, component ids) signature used for diversity-aware ranking"""
+        return tuple(
+            frozenset(ids[offsets[position]:offsets[position + 1]])
+            for offsets, ids in (self._signature_tags, self._signature_components)
+        )
+
+    def get(self, template_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if template_id is None:
+            return None
+        i = self._ids.find(template_id)
+        return self.template(self._ids.postings(i)[0]) if i >= 0 else None
+
+    def component_hits(self, selected_components) -> Dict[int, int]:
+        """Count selected components per template, skipping templates with no overlap"""
+        hits: Dict[int, int] = {}
+        for component in set(selected_components):
+            i = self._components.find(component)
+            if i < 0:
+                continue
+            for position in self._components.postings(i):
+                hits[position] = hits.get(position, 0) + 1
+        return hits
+
+    def search(self, field: str, query: str, limit: int) -> List[str]:
+        """Ids of up to `limit` templates whose `field` matches search_pattern(query).
+
+        Candidates come from the word index (every query word must prefix a
+        word of the field) and are confirmed against the pattern. Queries
+        without any word characters match nothing.
+        """
+        words = text_words(query)
+        if not words:
+            return []
+        positions = None
+        for word in words:
+            matches = self._words[field].prefix_postings(word)
+            positions = matches if positions is None else positions & matches
+            if not positions:
+                return []
+        pattern = re.compile(search_pattern(query), re.IGNORECASE)
+        ids = []
+        for position in sorted(positions):
+            template = self.template(position)
+            if pattern.search(template[field]):
+                ids.append(template["id"])
+                if len(ids) >= limit:
+                    break
+        return ids
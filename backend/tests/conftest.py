@@ -0,0 +1,59 @@
+import os
+import sys
+
+# Tests import the backend modules (server, template_catalog, ...) directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+def _idea_payload(**overrides):
+    idea = {
+        "title": "Air Quality Monitor",
+        "description": "Monitors air quality",
+        "problem_statement": "Indoor air pollution",
+        "working_principle": "Sensors feed a microcontroller",
+        "difficulty": "Beginner",
+        "estimated_cost": "₹1,000",
+        "components": ["ESP32"],
+        "innovation_elements": [],
+        "scalability_options": [],
+        "availability": "Available",
+        "tags": ["IoT"],
+    }
+    idea.update(overrides)
+    return idea
+
+
+@pytest.fixture
+def make_idea():
+    """Build saved idea request bodies, overriding any field"""
+    return _idea_payload
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """In-memory stand-in for the MongoDB database"""
+    database = AsyncMongoMockClient().atal_idea_generator
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+
+@pytest.fixture
+def server_state(db, tmp_path, monkeypatch):
+    """Fresh per-test catalog and rate limit state"""
+    monkeypatch.setattr(server, "TEMPLATE_CATALOG_PATH", str(tmp_path / "template_catalog.bin"))
+    monkeypatch.setattr(server, "TEMPLATE_INDEX", server.TEMPLATE_INDEX)
+    for controller in (server.generate_admission, server.search_admission):
+        controller.buckets.clear()
+
+
+@pytest.fixture
+def client(server_state):
+    """Test client with startup/shutdown events run"""
+    with TestClient(server.app) as test_client:
+        yield test_client
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import server
+
+
+def make_request(address="10.0.0.1"):
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": [], "client": (address, 1234)})
+
+
+def make_controller(**overrides):
+    options = dict(rate_per_minute=60, burst=2, concurrency=1, queue_limit=1,
+                   address_rate_per_minute=60, address_burst=3)
+    options.update(overrides)
+    return server.AdmissionController("test", **options)
+
+
+async def admit(controller, user_id="alice", address="10.0.0.1"):
+    """Run the dependency up to its yield; returns the generator holding the slot"""
+    dependency = controller(make_request(address), user_id)
+    await dependency.__anext__()
+    return dependency
+
+
+async def release(dependency):
+    with pytest.raises(StopAsyncIteration):
+        await dependency.__anext__()
+
+
+def test_rate_limit_returns_429_with_retry_after():
+    async def scenario():
+        controller = make_controller()
+        for _ in range(2):
+            await release(await admit(controller))
+        with pytest.raises(HTTPException) as error:
+            await admit(controller)
+        return controller, error.value
+
+    controller, error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert int(error.headers["Retry-After"]) >= 1
+    assert controller.rate_limited == 1
+
+
+def test_rotating_user_id_does_not_bypass_address_limit():
+    async def scenario():
+        controller = make_controller()
+        for n in range(3):
+            await release(await admit(controller, user_id=f"user-{n}"))
+        with pytest.raises(HTTPException) as error:
+            await admit(controller, user_id="user-fresh")
+        await release(await admit(controller, user_id="user-fresh", address="10.0.0.2"))
+        return error.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+
+def test_full_queue_is_shed_with_503():
+    async def scenario():
+        controller = make_controller(burst=10, address_burst=10)
+        holder = await admit(controller)
+        waiter = asyncio.ensure_future(admit(controller))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as error:
+            await admit(controller)
+        await release(holder)
+        await release(await waiter)
+        return controller, error.value
+
+    controller, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+    assert controller.shed == 1
+    assert controller.admitted == 2
+
+
+def test_tracked_buckets_are_bounded(monkeypatch):
+    monkeypatch.setattr(server.AdmissionController, "MAX_TRACKED_CLIENTS", 10)
+    controller = make_controller(burst=100, address_burst=100)
+    for n in range(50):
+        controller.take("10.0.0.1", f"user-{n}")
+    assert len(controller.buckets) == 10
+    assert ("10.0.0.1", None) in controller.buckets
+
+
+def test_rate_limited_route_responds_429(client):
+    server.generate_admission.buckets.clear()
+    responses = [client.post("/api/generate-ideas", json={}) for _ in range(server.generate_admission.burst + 1)]
+    assert responses[-1].status_code == 429
+    assert "Retry-After" in responses[-1].headers
+
+
+def test_address_header_separates_clients_behind_a_proxy(monkeypatch):
+    monkeypatch.setattr(server, "ADMISSION_ADDRESS_HEADER", "x-real-ip")
+    behind_proxy = Request({"type": "http", "method": "POST", "path": "/", "client": ("10.0.0.1", 1234),
+                            "headers": [(b"x-real-ip", b"203.0.113.7, 10.0.0.1")]})
+    assert server.client_address(behind_proxy) == "203.0.113.7"
+    assert server.client_address(make_request()) == "10.0.0.1"
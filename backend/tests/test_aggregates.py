@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def stored_idea(make_idea):
+    """Saved idea documents as written by the API"""
+    def build(idea_id, user_id="default", **overrides):
+        return make_idea(**{"id": idea_id, "user_id": user_id, "is_favorite": False, **overrides})
+    return build
+
+
+async def save(db, idea, pause=0.0):
+    """Save an idea the way the API does, optionally pausing between the write and its delta"""
+    async with server.aggregate_change(idea["user_id"]) as delta:
+        await db.saved_ideas.insert_one(dict(idea))
+        await asyncio.sleep(pause)
+        delta.update(server.idea_contribution(idea))
+
+
+def breakdown(user_id="default"):
+    return asyncio.run(server.get_stats_breakdown(user_id=user_id))
+
+
+def test_first_change_builds_aggregates_from_existing_ideas(client, db, stored_idea, make_idea):
+    asyncio.run(db.saved_ideas.insert_many([stored_idea("legacy-1"), stored_idea("legacy-2", is_favorite=True)]))
+
+    client.post("/api/ideas", json=make_idea(tags=["Robotics"], difficulty="Advanced"))
+    result = client.get("/api/stats/breakdown").json()
+
+    assert result["total"] == 3
+    assert result["favorites"] == 1
+    assert result["by_tag"] == {"IoT": 2, "Robotics": 1}
+    assert result["by_difficulty"] == {"Beginner": 2, "Advanced": 1}
+
+
+def test_two_deltas_after_two_inserts_count_once(db, stored_idea):
+    a, b = stored_idea("a"), stored_idea("b")
+
+    async def scenario():
+        await db.saved_ideas.insert_many([dict(a), dict(b)])
+        for idea in (a, b):
+            async with server.aggregate_change("default") as delta:
+                delta.update(server.idea_contribution(idea))
+
+    asyncio.run(scenario())
+    assert breakdown()["total"] == 2
+
+
+def test_concurrent_first_saves_and_breakdown_count_once(db, stored_idea):
+    async def scenario():
+        await db.saved_ideas.insert_one(stored_idea("legacy"))
+        await asyncio.gather(
+            save(db, stored_idea("a"), pause=0.02),
+            save(db, stored_idea("b"), pause=0.01),
+            server.get_stats_breakdown(user_id="default"),
+        )
+        return await server.get_stats_breakdown(user_id="default")
+
+    assert asyncio.run(scenario())["total"] == 3
+
+
+def test_reconcile_waits_for_pending_changes(db, stored_idea):
+    async def scenario():
+        await save(db, stored_idea("a"))
+        await db.idea_aggregates.update_one({"user_id": "default"}, {"$inc": {"total": 5}})
+        saving = asyncio.ensure_future(save(db, stored_idea("b"), pause=0.1))
+        await asyncio.sleep(0.01)
+        report = await server.reconcile_aggregates("default")
+        await saving
+        return report
+
+    assert asyncio.run(scenario())["repaired"]
+    assert breakdown()["total"] == 2
+
+
+def test_reconcile_repairs_drift_as_increment(client, db, make_idea):
+    client.post("/api/ideas", json=make_idea())
+    asyncio.run(db.idea_aggregates.update_one({"user_id": "default"}, {"$inc": {"total": 5, "by_tag.IoT": -1}}))
+
+    report = client.post("/api/stats/breakdown/reconcile").json()
+    assert report["repaired"]
+    assert report["drift"]["total"] == {"expected": 1, "actual": 6}
+    result = client.get("/api/stats/breakdown").json()
+    assert result["total"] == 1
+    assert result["by_tag"] == {"IoT": 1}
+    assert not client.post("/api/stats/breakdown/reconcile").json()["drift"]
+
+
+def test_favorite_toggle_and_delete_update_aggregates(client, make_idea):
+    idea = client.post("/api/ideas", json=make_idea()).json()
+    client.patch(f"/api/ideas/{idea['id']}/favorite", params={"is_favorite": True})
+    assert client.get("/api/stats/breakdown").json()["favorites"] == 1
+    client.delete(f"/api/ideas/{idea['id']}")
+    assert client.get("/api/stats/breakdown").json() == {"total": 0, "favorites": 0, "by_tag": {}, "by_difficulty": {}}
+
+
+def test_compact_idea_with_unknown_template_counts_as_unknown(client, db):
+    asyncio.run(db.saved_ideas.insert_one(
+        {"id": "orphan", "user_id": "default", "template_id": "retired-template", "tags": ["IoT"]}
+    ))
+    reports = asyncio.run(server.reconcile_all_aggregates())
+    assert reports[0]["repaired"]
+    assert client.get("/api/stats/breakdown").json()["by_difficulty"] == {"Unknown": 1}
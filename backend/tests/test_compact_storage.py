@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+import server
+from template_catalog import TemplateCatalog
+
+
+def template_idea(template):
+    return {
+        "template_id": template["id"],
+        "title": template["title"],
+        "description": template["description"],
+        "problem_statement": template["problem_statement"],
+        "working_principle": template["working_principle"],
+        "difficulty": template["difficulty"],
+        "estimated_cost": template["estimated_cost"],
+        "components": template["required_components"],
+        "innovation_elements": template["innovation_elements"],
+        "scalability_options": template["scalability_options"],
+        "availability": "Available",
+        "tags": template["tags"],
+    }
+
+
+@pytest.fixture
+def compact(monkeypatch):
+    monkeypatch.setattr(server, "COMPACT_IDEA_STORAGE", True)
+
+
+def test_catalog_text_search_uses_word_prefixes():
+    catalog = TemplateCatalog.from_templates(server.PROJECT_TEMPLATES)
+    assert catalog.search("title", "air quality", 10) == ["air-quality-monitor"]
+    assert catalog.search("title", "SMART", 10) == [
+        "smart-plant-watering", "smart-traffic-light", "health-monitoring-wearable"
+    ]
+    assert catalog.search("title", "smart", 1) == ["smart-plant-watering"]
+    assert catalog.search("title", "monit", 10) == ["air-quality-monitor", "health-monitoring-wearable"]
+    assert catalog.search("title", "onitor", 10) == []
+    assert catalog.search("title", "quality air", 10) == []
+    assert catalog.search("title", "(", 10) == []
+
+
+def test_compact_ideas_are_found_through_their_template(client, db, compact):
+    client.post("/api/ideas", json=template_idea(server.PROJECT_TEMPLATES[1]))
+    stored = asyncio.run(db.saved_ideas.find_one({}))
+    assert "title" not in stored
+
+    results = client.get("/api/ideas/search", params={"query": "Air Quality"}).json()
+    assert [idea["template_id"] for idea in results] == ["air-quality-monitor"]
+    assert results[0]["title"] == server.PROJECT_TEMPLATES[1]["title"]
+    assert client.get("/api/ideas/search", params={"query": "Air (Quality"}).json() == []
+
+
+def test_search_skips_template_lookup_without_compact_storage(client, monkeypatch):
+    client.post("/api/ideas", json=template_idea(server.PROJECT_TEMPLATES[1]))
+
+    def fail(*args):
+        raise AssertionError("template catalog searched")
+
+    monkeypatch.setattr(server.TEMPLATE_INDEX, "search", fail)
+    assert len(client.get("/api/ideas/search", params={"query": "air quality"}).json()) == 1
+
+
+def test_ideas_with_unknown_templates_do_not_break_listing(client, db, compact):
+    template = dict(server.PROJECT_TEMPLATES[0], id="retired-template")
+    client.post("/api/ideas", json=template_idea(server.PROJECT_TEMPLATES[1]))
+    asyncio.run(db.saved_ideas.insert_many([
+        {"id": "stored", "user_id": "default", "template_id": "retired-template", "availability": "Available",
+         "tags": [], "is_favorite": False},
+        {"id": "orphan", "user_id": "default", "template_id": "missing-template", "availability": "Available",
+         "tags": [], "is_favorite": False},
+    ]))
+    asyncio.run(db.project_templates.insert_one(template))
+
+    response = client.get("/api/ideas")
+    assert response.status_code == 200
+    ideas = {idea["id"]: idea for idea in response.json()}
+    assert "orphan" not in ideas
+    assert ideas["stored"]["title"] == template["title"]
+    assert len(ideas) == 2
+
+
+def test_compact_and_full_ideas_match_the_same_queries(client, db, monkeypatch):
+    template = server.PROJECT_TEMPLATES[1]
+    client.post("/api/ideas", json=template_idea(template))
+    monkeypatch.setattr(server, "COMPACT_IDEA_STORAGE", True)
+    client.post("/api/ideas", json=template_idea(template))
+    stored = asyncio.run(db.saved_ideas.find({}).to_list(None))
+    assert sorted("title" in idea for idea in stored) == [False, True]
+
+    for query, expected in [("Air Quality", 2), ("quality mon", 2), ("ALERT", 2), ("onitor", 0), ("Air (", 0)]:
+        results = client.get("/api/ideas/search", params={"query": query}).json()
+        assert len(results) == expected, query
+
+
+def test_truncated_template_matches_are_flagged(client, compact, monkeypatch):
+    for template in server.PROJECT_TEMPLATES:
+        client.post("/api/ideas", json=template_idea(template))
+    monkeypatch.setattr(server, "TEMPLATE_SEARCH_LIMIT", 1)
+    response = client.get("/api/ideas/search", params={"query": "smart"})
+    assert response.headers["x-search-truncated"] == "true"
+    assert len(response.json()) == 1
+    assert "x-search-truncated" not in client.get("/api/ideas/search", params={"query": "air"}).headers
+
+
+def test_missing_templates_are_logged_once(client, db, compact, caplog, monkeypatch):
+    monkeypatch.setattr(server, "reported_missing_templates", set())
+    asyncio.run(db.saved_ideas.insert_many([
+        {"id": f"orphan-{n}", "user_id": "default", "template_id": "missing-template", "availability": "Available",
+         "tags": [], "is_favorite": False}
+        for n in range(3)
+    ]))
+    with caplog.at_level("WARNING"):
+        client.get("/api/ideas")
+        client.get("/api/ideas")
+    assert [record.getMessage() for record in caplog.records] == [
+        "Skipping saved ideas for missing template missing-template"
+    ]
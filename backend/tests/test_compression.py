@@ -0,0 +1,102 @@
+import asyncio
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+import server
+
+LARGE = {"items": ["component"] * 500}
+SMALL = {"ok": True}
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large():
+        return JSONResponse(LARGE)
+
+    @app.get("/small")
+    async def small():
+        return JSONResponse(SMALL)
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            for n in range(3):
+                yield f"data: {n}\n\n" * 200
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    app.add_middleware(server.CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_choose_encoding_prefers_brotli_and_honours_q_zero():
+    assert server.choose_encoding("gzip, deflate, br") == "br"
+    assert server.choose_encoding("br;q=0, gzip") == "gzip"
+    assert server.choose_encoding("identity") is None
+    assert server.choose_encoding("*") == "br"
+
+
+def test_gzip_and_brotli_negotiation():
+    client = make_app()
+    gzipped = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+    assert gzipped.json() == LARGE
+
+    compressed = client.get("/large", headers={"Accept-Encoding": "br"})
+    assert compressed.headers["content-encoding"] == "br"
+    assert int(compressed.headers["content-length"]) < len(compressed.content)
+    assert compressed.json() == LARGE
+
+
+def test_small_and_unnegotiated_responses_are_not_compressed():
+    client = make_app()
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_streamed_responses_pass_through():
+    client = make_app()
+    response = client.get("/events", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
+    assert response.text.count("data: ") == 600
+
+
+def test_gzip_body_is_valid():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"[" + b"1," * 1000 + b"1]"})
+
+    sent = []
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(server.CompressionMiddleware(app)(scope, receive, send))
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(sent[1]["body"]) == b"[" + b"1," * 1000 + b"1]"
+    assert int(headers[b"content-length"]) == len(sent[1]["body"])
+
+
+def test_matching_if_none_match_returns_304(client):
+    first = client.get("/api/components")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+
+    cached = client.get("/api/components", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert client.get("/api/components", headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+
+    ideas = client.get("/api/ideas")
+    assert client.get("/api/ideas", headers={"If-None-Match": ideas.headers["etag"]}).status_code == 304
@@ -0,0 +1,59 @@
+import server
+from template_catalog import TemplateCatalog
+
+SELECTED = ["Arduino Uno", "Soil Moisture Sensor", "ESP32", "OLED Display"]
+
+
+def make_template(template_id, components, tags):
+    return {
+        "id": template_id,
+        "title": template_id.replace("-", " ").title(),
+        "description": "Test template",
+        "problem_statement": "Test problem",
+        "working_principle": "Test principle",
+        "difficulty": "Beginner",
+        "estimated_cost": "₹500",
+        "required_components": components,
+        "innovation_elements": [],
+        "scalability_options": [],
+        "tags": tags,
+        "theme": tags[0],
+    }
+
+
+def use_catalog(monkeypatch):
+    templates = [
+        # Full match
+        make_template("plant-monitor", ["Arduino Uno", "Soil Moisture Sensor"], ["Agriculture", "IoT"]),
+        # Near duplicate of the best match, 2/3 matched
+        make_template("plant-logger", ["Arduino Uno", "Soil Moisture Sensor", "SD Card"], ["Agriculture", "IoT"]),
+        # Unrelated tags and parts, 2/4 matched
+        make_template("desk-display", ["ESP32", "OLED Display", "Buzzer", "Button"], ["Education", "Display"]),
+    ]
+    monkeypatch.setattr(server, "TEMPLATE_INDEX", TemplateCatalog.from_templates(templates))
+
+
+def ranked_ids(**options):
+    request = server.IdeaGenerationRequest(selected_components=SELECTED, count=2, **options)
+    return [idea["template_id"] for idea in server.rank_project_ideas(request)]
+
+
+def test_diversify_prefers_a_lower_scored_template_with_less_overlap(monkeypatch):
+    use_catalog(monkeypatch)
+    assert ranked_ids() == ["plant-monitor", "plant-logger"]
+    assert ranked_ids(diversify=True) == ["plant-monitor", "desk-display"]
+
+
+def test_full_relevance_weight_matches_plain_ranking(monkeypatch):
+    use_catalog(monkeypatch)
+    assert ranked_ids(diversify=True, diversity_lambda=1.0) == ranked_ids()
+
+
+def test_signatures_are_precomputed_ids():
+    catalog = TemplateCatalog.from_templates(server.PROJECT_TEMPLATES)
+    tags, components = catalog.signature(0)
+    assert len(tags) == len(server.PROJECT_TEMPLATES[0]["tags"])
+    assert len(components) == len(server.PROJECT_TEMPLATES[0]["required_components"])
+    assert all(isinstance(i, int) for i in tags | components)
+    # Shared tags map to the same ids across templates
+    assert catalog.signature(1)[0] & catalog.signature(0)[0]
@@ -0,0 +1,45 @@
+import json
+import os
+
+import generate_fixtures
+import server
+from template_catalog import TemplateCatalog
+
+SIZES = ["--components", "40", "--templates", "60", "--users", "25", "--ideas-per-user", "4"]
+
+
+def generate(output_dir, *args):
+    generate_fixtures.main(["--output-dir", str(output_dir), *SIZES, *args])
+    return {
+        name: open(os.path.join(output_dir, name), encoding="utf-8").read()
+        for name in sorted(os.listdir(output_dir))
+    }
+
+
+def read_documents(content):
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def test_same_seed_produces_identical_output(tmp_path):
+    first = generate(tmp_path / "first", "--seed", "7")
+    second = generate(tmp_path / "second", "--seed", "7")
+    other = generate(tmp_path / "other", "--seed", "8")
+
+    assert first == second
+    assert first["saved_ideas.jsonl"]
+    assert first != other
+
+
+def test_compact_saved_ideas_hydrate_against_generated_templates(tmp_path, monkeypatch):
+    files = generate(tmp_path, "--seed", "7", "--compact")
+    templates = read_documents(files["project_templates.jsonl"])
+    ideas = read_documents(files["saved_ideas.jsonl"])
+    monkeypatch.setattr(server, "TEMPLATE_INDEX", TemplateCatalog.from_templates(server.PROJECT_TEMPLATES + templates))
+
+    assert any("title" not in idea for idea in ideas)
+    for idea in ideas:
+        hydrated = server.SavedIdea(**server.hydrate_idea_document(idea))
+        template = server.TEMPLATE_INDEX.get(idea["template_id"])
+        assert hydrated.title == idea.get("title", template["title"])
+        assert hydrated.description == template["description"]
+        assert hydrated.components == template["required_components"]
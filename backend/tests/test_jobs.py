@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+import server
+
+REQUEST = {"selected_components": ["Arduino Uno", "Soil Moisture Sensor", "Water Pump"], "count": 2}
+
+
+def wait_for_job(client, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_submit_poll_and_stream(client):
+    submitted = client.post("/api/jobs/generate-ideas", json=REQUEST)
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+
+    job = wait_for_job(client, job_id)
+    assert job["status"] == "completed"
+    assert job["ideas"][0]["template_id"] == "smart-plant-watering"
+
+    events = client.get(f"/api/jobs/{job_id}/events").text
+    assert events.count("event: idea") == len(job["ideas"])
+    assert "event: done" in events
+    assert client.get(f"/api/jobs/{job_id}", headers={"X-User-Id": "someone-else"}).status_code == 404
+
+
+def test_generation_runs_off_the_event_loop(client, monkeypatch):
+    threads = []
+    rank = server.rank_project_ideas
+
+    def recording_rank(request):
+        threads.append(threading.current_thread().name)
+        return rank(request)
+
+    monkeypatch.setattr(server, "rank_project_ideas", recording_rank)
+    job_id = client.post("/api/jobs/generate-ideas", json=REQUEST).json()["job_id"]
+    wait_for_job(client, job_id)
+    assert threads and threads[0].startswith("generation-job")
+
+
+def test_full_queue_returns_503(client, monkeypatch):
+    release = threading.Event()
+    rank = server.rank_project_ideas
+
+    def blocked_rank(request):
+        release.wait(5)
+        return rank(request)
+
+    monkeypatch.setattr(server, "rank_project_ideas", blocked_rank)
+    monkeypatch.setattr(server.generate_admission, "burst", 1000)
+    monkeypatch.setattr(server.generate_admission, "address_burst", 1000)
+    try:
+        responses = [
+            client.post("/api/jobs/generate-ideas", json=REQUEST)
+            for _ in range(server.JOB_WORKERS + server.JOB_QUEUE_LIMIT + 1)
+        ]
+    finally:
+        release.set()
+    statuses = [response.status_code for response in responses]
+    assert statuses[-1] == 503
+    assert responses[-1].headers["retry-after"] == "5"
+    assert statuses.count(202) >= server.JOB_QUEUE_LIMIT
+
+
+def stored_job(job_id, user_id="default", status="completed", finished_at=None, **fields):
+    created_at = datetime.now()
+    return {"id": job_id, "user_id": user_id, "status": status, "ideas": [], "error": None,
+            "created_at": created_at, "finished_at": finished_at or created_at,
+            "expires_at": created_at + timedelta(minutes=10), **fields}
+
+
+def test_jobs_are_served_from_the_shared_store(client, db):
+    # A job submitted to and finished by another worker process
+    idea = {"id": "idea-1", "title": "Shared Idea"}
+    asyncio.run(db.generation_jobs.insert_one(stored_job("elsewhere", ideas=[idea])))
+
+    job = client.get("/api/jobs/elsewhere").json()
+    assert job["status"] == "completed"
+    assert job["ideas"] == [idea]
+    events = client.get("/api/jobs/elsewhere/events").text
+    assert "Shared Idea" in events and "event: done" in events
+
+
+def test_store_limit_refuses_new_jobs(client, db, monkeypatch):
+    monkeypatch.setattr(server, "JOB_STORE_LIMIT", 2)
+    asyncio.run(db.generation_jobs.insert_many([stored_job("a"), stored_job("b")]))
+    response = client.post("/api/jobs/generate-ideas", json=REQUEST)
+    assert response.status_code == 503
+
+
+def test_finished_jobs_are_trimmed_per_user(client, db, monkeypatch):
+    monkeypatch.setattr(server, "JOB_HISTORY_PER_USER", 2)
+    now = datetime.now()
+    asyncio.run(db.generation_jobs.insert_many([
+        stored_job(f"old-{n}", finished_at=now - timedelta(minutes=n + 1)) for n in range(3)
+    ] + [stored_job("other-user", user_id="bob", finished_at=now - timedelta(minutes=9))]))
+
+    wait_for_job(client, client.post("/api/jobs/generate-ideas", json=REQUEST).json()["job_id"])
+    remaining = {job["id"] for job in asyncio.run(db.generation_jobs.find({}).to_list(None))}
+    assert len(remaining) == 3
+    assert {"old-0", "other-user"} <= remaining
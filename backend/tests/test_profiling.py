@@ -0,0 +1,114 @@
+import asyncio
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import server
+
+TOKEN = "s3cret"
+
+
+def make_client(tmp_path, **options):
+    app = FastAPI()
+
+    @app.get("/api/work")
+    async def work():
+        return {"total": sum(range(1000))}
+
+    @app.get("/api/other")
+    async def other():
+        return {"ok": True}
+
+    settings = dict(mode="header", routes=["/api/work"], token=TOKEN, directory=str(tmp_path), keep=10,
+                    min_interval=0)
+    settings.update(options)
+    app.add_middleware(server.ProfilingMiddleware, **settings)
+    return TestClient(app)
+
+
+def profile_files(tmp_path):
+    return sorted(os.listdir(tmp_path)) if os.path.isdir(tmp_path) else []
+
+
+def test_off_mode_does_not_install_the_middleware():
+    app = FastAPI()
+    assert not server.install_profiling(app, "off")
+    assert app.user_middleware == []
+    assert server.install_profiling(app, "always")
+    assert app.user_middleware[0].cls is server.ProfilingMiddleware
+
+
+def test_header_mode_requires_the_token(tmp_path):
+    client = make_client(tmp_path)
+    assert "x-profile-id" not in client.get("/api/work").headers
+    assert "x-profile-id" not in client.get("/api/work", headers={"X-Profile": "1"}).headers
+    assert profile_files(tmp_path) == []
+
+    response = client.get("/api/work", headers={"X-Profile": TOKEN})
+    profile_id = response.headers["x-profile-id"]
+    assert response.json() == {"total": 499500}
+    assert profile_files(tmp_path) == [f"{profile_id}.alloc.txt", f"{profile_id}.collapsed", f"{profile_id}.prof"]
+
+
+def test_header_mode_without_a_configured_token_profiles_nothing(tmp_path):
+    client = make_client(tmp_path, token="")
+    assert "x-profile-id" not in client.get("/api/work", headers={"X-Profile": ""}).headers
+
+
+def test_only_configured_routes_are_profiled(tmp_path):
+    client = make_client(tmp_path, mode="always")
+    assert "x-profile-id" in client.get("/api/work").headers
+    assert "x-profile-id" not in client.get("/api/other").headers
+
+
+def test_only_the_newest_profiles_are_kept(tmp_path):
+    client = make_client(tmp_path, mode="always", keep=2)
+    ids = [client.get("/api/work").headers["x-profile-id"] for _ in range(3)]
+    assert {name.split(".")[0] for name in profile_files(tmp_path)} == set(sorted(ids)[1:])
+
+
+def test_captures_are_rate_limited(tmp_path):
+    client = make_client(tmp_path, mode="always", min_interval=60)
+    assert "x-profile-id" in client.get("/api/work").headers
+    assert "x-profile-id" not in client.get("/api/work").headers
+
+
+def test_one_capture_at_a_time(tmp_path):
+    release = None
+
+    async def slow_app(scope, receive, send):
+        if scope["path"] == "/api/slow":
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = server.ProfilingMiddleware(slow_app, mode="always", routes=["/api"], directory=str(tmp_path),
+                                            keep=10, min_interval=0)
+
+    async def request(path):
+        sent = []
+
+        async def receive():
+            return {"type": "http.request"}
+
+        async def send(message):
+            sent.append(message)
+
+        await middleware(
+            {"type": "http", "method": "GET", "path": path, "headers": []}, receive, send
+        )
+        return dict(sent[0]["headers"])
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        slow = asyncio.ensure_future(request("/api/slow"))
+        await asyncio.sleep(0.01)
+        concurrent = await request("/api/fast")
+        release.set()
+        return await slow, concurrent
+
+    slow, concurrent = asyncio.run(scenario())
+    assert b"x-profile-id" in slow
+    assert b"x-profile-id" not in concurrent
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+import server
+from template_catalog import TemplateCatalog, read_catalog_version, write_catalog_file
+
+
+def extra_templates():
+    return [
+        {
+            "id": f"extra-{i}",
+            "title": f"Extra Project {i}",
+            "description": "Extra description",
+            "problem_statement": "Extra problem",
+            "working_principle": "Extra principle",
+            "difficulty": ["Beginner", "Intermediate", "Advanced"][i % 3],
+            "estimated_cost": "₹100",
+            "required_components": ["ESP32", f"Part {i}", f"Part {i + 1}"],
+            "innovation_elements": [],
+            "scalability_options": [],
+            "tags": ["IoT", f"Tag {i % 4}"],
+            "theme": "IoT",
+        }
+        for i in range(50)
+    ]
+
+
+def test_file_catalog_round_trip(tmp_path):
+    templates = server.PROJECT_TEMPLATES + extra_templates()
+    path = str(tmp_path / "catalog.bin")
+    write_catalog_file(templates, path, "v1")
+
+    catalog = TemplateCatalog.open(path)
+    assert read_catalog_version(path) == "v1"
+    assert len(catalog) == len(templates)
+    for position, template in enumerate(templates):
+        assert catalog.template(position) == template
+        assert catalog.get(template["id"]) == template
+        assert catalog.difficulty(position) == template["difficulty"]
+        assert catalog.required_count(position) == len(set(template["required_components"]))
+    assert catalog.get("missing") is None
+    assert catalog.get(None) is None
+
+
+def test_component_hits_match_a_full_scan():
+    templates = server.PROJECT_TEMPLATES + extra_templates()
+    catalog = TemplateCatalog.from_templates(templates)
+    selected = ["ESP32", "OLED Display", "Part 3", "Part 4", "Camera Module", "Not A Part"]
+
+    expected = {}
+    for position, template in enumerate(templates):
+        hits = len(set(selected) & set(template["required_components"]))
+        if hits:
+            expected[position] = hits
+    assert catalog.component_hits(selected) == expected
+
+
+def test_read_catalog_version_of_missing_file(tmp_path):
+    assert read_catalog_version(str(tmp_path / "missing.bin")) is None
+
+
+def test_generation_reads_the_shared_catalog(tmp_path, monkeypatch):
+    path = str(tmp_path / "catalog.bin")
+    write_catalog_file(server.PROJECT_TEMPLATES + extra_templates(), path)
+    monkeypatch.setattr(server, "TEMPLATE_INDEX", TemplateCatalog.open(path))
+
+    request = server.IdeaGenerationRequest(selected_components=["ESP32", "Part 7", "Part 8"], count=3)
+    ideas = asyncio.run(server.generate_intelligent_ideas(request))
+    assert ideas[0]["template_id"] == "extra-7"
+    assert ideas[0]["match_score"] == 1.0
+
+
+def test_matching_components_never_return_the_fallback():
+    request = server.IdeaGenerationRequest(selected_components=["Arduino Uno", "Soil Moisture Sensor"], count=1)
+    ideas = server.rank_project_ideas(request)
+    assert [idea["template_id"] for idea in ideas] == ["smart-plant-watering"]
+    # Without any match the custom fallback project is returned
+    assert server.rank_project_ideas(server.IdeaGenerationRequest(selected_components=["Nothing"]))[0]["title"] == \
+        "Custom Component Project"
+
+
+def test_count_must_be_positive():
+    with pytest.raises(ValueError):
+        server.IdeaGenerationRequest(selected_components=["Arduino Uno"], count=0)
@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+def test_ideas_and_stats_are_scoped_per_user(client, make_idea):
+    client.post("/api/ideas", json=make_idea(), headers={"X-User-Id": "alice"})
+    client.post("/api/ideas", json=make_idea(), headers={"X-User-Id": "alice"})
+    client.post("/api/ideas", json=make_idea(), headers={"X-User-Id": "bob"})
+
+    assert len(client.get("/api/ideas", headers={"X-User-Id": "alice"}).json()) == 2
+    assert len(client.get("/api/ideas", headers={"X-User-Id": "bob"}).json()) == 1
+    assert client.get("/api/ideas").json() == []
+    assert client.get("/api/stats", headers={"X-User-Id": "alice"}).json()["ideas_generated"] == 2
+
+
+def test_legacy_duplicates_are_merged_before_unique_indexes(db, server_state):
+    now = datetime.now()
+    asyncio.run(db.user_preferences.insert_many([
+        {"id": "old", "skill_level": "Beginner", "last_updated": now - timedelta(days=1)},
+        {"id": "new", "skill_level": "Advanced", "last_updated": now},
+    ]))
+    asyncio.run(db.user_stats.insert_many([
+        {"id": "a", "ideas_generated": 3, "last_active_date": now - timedelta(days=1)},
+        {"id": "b", "ideas_generated": 4, "last_active_date": now},
+    ]))
+
+    with TestClient(server.app) as client:
+        preferences = client.get("/api/preferences").json()
+        stats = client.get("/api/stats").json()
+
+    assert preferences["id"] == "new"
+    assert preferences["skill_level"] == "Advanced"
+    assert stats["id"] == "b"
+    assert stats["ideas_generated"] == 7
+    assert asyncio.run(db.user_preferences.count_documents({})) == 1
+    assert asyncio.run(db.user_stats.count_documents({})) == 1
+
+
+def test_legacy_migration_runs_only_until_indexes_exist(db, server_state, monkeypatch):
+    with TestClient(server.app):
+        pass
+    assert asyncio.run(server.user_scoping_migrated())
+
+    def fail():
+        raise AssertionError("legacy migration ran again")
+
+    monkeypatch.setattr(server, "migrate_legacy_user_documents", fail)
+    with TestClient(server.app) as client:
+        assert client.get("/api/stats").status_code == 200
@@ -359,6 +359,36 @@ class BackendTester:
         except requests.exceptions.RequestException as e:
             self.log_test("AI Idea Generation", False, f"Connection error: {str(e)}")
     
+    def test_diversified_idea_generation(self):
+        """Test /api/generate-ideas with diversified (MMR) ranking"""
+        try:
+            generation_request = {
+                "selected_components": ["Raspberry Pi 4", "Camera Module", "Servo Motors",
+                                        "Ultrasonic Sensors", "ESP32", "OLED Display"],
+                "count": 3,
+                "diversify": True,
+                "diversity_lambda": 0.5
+            }
+            
+            response = self.session.post(f"{API_BASE}/generate-ideas", 
+                                       json=generation_request, timeout=15)
+            
+            if response.status_code == 200:
+                generated_ideas = response.json()
+                titles = [idea.get("title") for idea in generated_ideas]
+                if isinstance(generated_ideas, list) and 0 < len(generated_ideas) <= 3 and len(set(titles)) == len(titles):
+                    self.log_test("Diversified Idea Generation", True, 
+                                f"Generated {len(generated_ideas)} distinct ideas",
+                                {"titles": titles})
+                else:
+                    self.log_test("Diversified Idea Generation", False, "Unexpected diversified result",
+                                {"titles": titles})
+            else:
+                self.log_test("Diversified Idea Generation", False, f"Unexpected status code: {response.status_code}")
+                
+        except requests.exceptions.RequestException as e:
+            self.log_test("Diversified Idea Generation", False, f"Connection error: {str(e)}")
+    
     def test_user_stats(self):
         """Test user statistics endpoint"""
         try:
@@ -378,6 +408,34 @@ class BackendTester:
         except requests.exceptions.RequestException as e:
             self.log_test("Get User Stats", False, f"Connection error: {str(e)}")
     
+    def test_stats_breakdown(self):
+        """Test /api/stats/breakdown and its reconciliation endpoint"""
+        try:
+            response = self.session.get(f"{API_BASE}/stats/breakdown", timeout=10)
+            
+            if response.status_code == 200:
+                breakdown = response.json()
+                if all(key in breakdown for key in ["total", "favorites", "by_tag", "by_difficulty"]):
+                    self.log_test("Get Stats Breakdown", True, "Breakdown retrieved successfully",
+                                {"total": breakdown.get("total"), "favorites": breakdown.get("favorites")})
+                else:
+                    self.log_test("Get Stats Breakdown", False, "Invalid breakdown format",
+                                {"response": breakdown})
+                    return
+            else:
+                self.log_test("Get Stats Breakdown", False, f"Unexpected status code: {response.status_code}")
+                return
+            
+            response = self.session.post(f"{API_BASE}/stats/breakdown/reconcile", timeout=10)
+            if response.status_code == 200 and not response.json().get("drift"):
+                self.log_test("Reconcile Stats Breakdown", True, "Aggregates match saved ideas")
+            else:
+                self.log_test("Reconcile Stats Breakdown", False, "Aggregate drift detected or request failed",
+                            {"status_code": response.status_code, "response": response.text})
+                
+        except requests.exceptions.RequestException as e:
+            self.log_test("Get Stats Breakdown", False, f"Connection error: {str(e)}")
+    
     def cleanup_test_data(self):
         """Clean up test data created during testing"""
         for idea_id in self.created_idea_ids:
@@ -401,7 +459,9 @@ class BackendTester:
         self.test_user_preferences()
         self.test_ideas_crud_operations()
         self.test_ai_idea_generation()
+        self.test_diversified_idea_generation()
         self.test_user_stats()
+        self.test_stats_breakdown()
         
         # Cleanup
         self.cleanup_test_data()
@@ -11,6 +11,29 @@ const api = axios.create({
   timeout: 10000,
 });
 
+// Per-install user id, generated on first use and kept in localStorage.
+// Installs that already used the app before ideas were scoped per user keep
+// the shared "default" id so their existing ideas, preferences and stats stay visible.
+const LEGACY_USER_ID = 'default';
+
+const getUserId = () => {
+  let userId = localStorage.getItem('userId');
+  if (!userId) {
+    const isExistingInstall =
+      localStorage.getItem('onboardingCompleted') !== null ||
+      localStorage.getItem('selectedComponents') !== null;
+    if (isExistingInstall) {
+      userId = LEGACY_USER_ID;
+    } else {
+      userId = window.crypto?.randomUUID
+        ? window.crypto.randomUUID()
+        : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    }
+    localStorage.setItem('userId', userId);
+  }
+  return userId;
+};
+
 // Request interceptor
 api.interceptors.request.use(
   (config) => {
@@ -19,6 +42,8 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    // Scope preferences, ideas and stats to this install
+    config.headers['X-User-Id'] = getUserId();
     return config;
   },
   (error) => {